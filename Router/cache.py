@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from os import path
+from typing import Any, Callable
+
+from utils.Debug import Debug, catch_exceptions
+
+from .constants import CACHE_MAX_BYTES, CACHE_TTL, HTTP_RECHECK
+
+
+class RouteCache:
+    """
+    On-disk cache of plotted routes keyed by the plot parameters.
+    Each route is stored as its own json file, an index tracks sizes and last use so
+    the least recently used entries can be evicted once the total exceeds max_bytes.
+    """
+    def __init__(self, directory:str, max_bytes:int = CACHE_MAX_BYTES, ttl:float|None = CACHE_TTL) -> None:
+        self.directory:str = directory
+        self.max_bytes:int = max_bytes
+        self.ttl:float|None = ttl
+        self.hits:int = 0
+        self.misses:int = 0
+        self._lock:threading.Lock = threading.Lock()
+        self._index:dict|None = None
+
+
+    @staticmethod
+    def key(source:str, dest:str, efficiency:int, range:float, supercharge_mult:int) -> str:
+        """ Normalise the plot parameters into a cache key """
+        return f"{source.strip().lower()}|{dest.strip().lower()}|{int(efficiency)}|{round(float(range), 2)}|{int(supercharge_mult)}"
+
+
+    def get(self, key:str) -> tuple[list, list]|None:
+        """ Return (headers, route) for a key or None if it isn't cached or has expired """
+        with self._lock:
+            index:dict = self._load_index()
+            entry:dict|None = index.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry['stored'] > self.ttl:
+                Debug.logger.debug(f"Route cache entry expired {key}")
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                Debug.logger.debug(f"Route cache miss {key} ({self._stats()})")
+                return None
+
+            try:
+                with open(path.join(self.directory, entry['file'])) as f:
+                    data:dict = json.load(f)
+            except (OSError, ValueError) as e:
+                Debug.logger.debug(f"Route cache entry unreadable {key}: {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            entry['used'] = time.time()
+            self._save_index()
+            self.hits += 1
+            Debug.logger.debug(f"Route cache hit {key} ({self._stats()})")
+            return data['headers'], data['route']
+
+
+    @catch_exceptions
+    def put(self, key:str, headers:list, route:list) -> None:
+        """ Store a route, evicting old entries if we're over budget """
+        with self._lock:
+            index:dict = self._load_index()
+            os.makedirs(self.directory, exist_ok=True)
+            file:str = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json'
+            data:bytes = json.dumps({'key': key, 'headers': headers, 'route': route}, separators=(',', ':')).encode('utf-8')
+            tmp:str = path.join(self.directory, file + '.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path.join(self.directory, file))
+
+            now:float = time.time()
+            index[key] = {'file': file, 'size': len(data), 'stored': now, 'used': now}
+            self._evict()
+            self._save_index()
+            Debug.logger.debug(f"Route cache stored {key} {len(data)} bytes ({self._stats()})")
+
+
+    def discard(self, key:str) -> None:
+        """ Remove an entry, e.g. one that turned out not to hold a usable route """
+        with self._lock:
+            self._remove(key)
+            self._save_index()
+
+
+    def clear(self) -> None:
+        """ Remove every cached route """
+        with self._lock:
+            for key in list(self._load_index().keys()):
+                self._remove(key)
+            self._save_index()
+
+
+    def _stats(self) -> str:
+        total:int = sum(e['size'] for e in self._load_index().values())
+        return f"hits={self.hits} misses={self.misses} entries={len(self._load_index())} bytes={total}"
+
+
+    def _evict(self) -> None:
+        """ Drop least recently used entries until we're within budget """
+        index:dict = self._load_index()
+        total:int = sum(e['size'] for e in index.values())
+        for key in sorted(index, key=lambda k: index[k]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['size']
+            Debug.logger.debug(f"Route cache evicting {key}")
+            self._remove(key)
+
+
+    def _remove(self, key:str) -> None:
+        entry:dict|None = self._load_index().pop(key, None)
+        if entry is None:
+            return
+        try:
+            os.remove(path.join(self.directory, entry['file']))
+        except OSError:
+            pass
+
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            self._index = {}
+            file:str = path.join(self.directory, 'index.json')
+            if path.exists(file):
+                try:
+                    with open(file) as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError) as e:
+                    Debug.logger.debug(f"Route cache index unreadable, starting afresh: {e}")
+        return self._index
+
+
+    def _save_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        file:str = path.join(self.directory, 'index.json')
+        with open(file + '.tmp', 'w') as f:
+            json.dump(self._load_index(), f)
+        os.replace(file + '.tmp', file)
+
+
+class MetadataCache:
+    """
+    On-disk cache of small parsed HTTP responses, such as the version file and release notes.
+    Entries keep the ETag and Last-Modified they came with so they're revalidated with a
+    conditional request, which costs a 304 when nothing has changed, and aren't rechecked at
+    all until min_age seconds have passed. Parsed bodies are kept so they're decoded once.
+    """
+    def __init__(self, file:str, min_age:float = HTTP_RECHECK) -> None:
+        self.file:str = file
+        self.min_age:float = min_age
+        self.hits:int = 0
+        self.misses:int = 0
+        self._lock:threading.Lock = threading.Lock()
+        self._entries:dict|None = None
+
+
+    def get(self, url:str, parse:Callable = json.loads, min_age:float|None = None, **kwargs) -> Any:
+        """
+        Return the parsed body of url, from the cache if it was checked within min_age seconds
+        or the server says it hasn't changed. A stale copy is returned if the server can't be
+        reached, None if there's nothing cached either.
+        """
+        min_age = self.min_age if min_age is None else min_age
+        with self._lock:
+            entry:dict|None = self._load().get(url)
+        if entry is not None and time.time() - entry['checked'] < min_age:
+            self.hits += 1
+            Debug.logger.debug(f"Metadata cache hit {url} ({self._stats()})")
+            return entry['body']
+
+        headers:dict = {**kwargs.pop('headers', {})}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('modified'):
+            headers['If-Modified-Since'] = entry['modified']
+        import requests
+        from .network import Network
+        try:
+            r:requests.Response = Network().get(url, headers=headers, **kwargs)
+            if r.status_code == 304 and entry is not None:
+                self.hits += 1
+                Debug.logger.debug(f"Metadata cache revalidated {url} ({self._stats()})")
+                self._store(url, {**entry, 'checked': time.time()})
+                return entry['body']
+            if r.status_code != 200:
+                Debug.logger.error(f"Could not fetch {url} (status code {r.status_code}): {r.text}")
+                return entry['body'] if entry is not None else None
+            body:Any = parse(r.content)
+        except (requests.RequestException, ValueError) as e:
+            Debug.logger.error(f"Could not fetch {url}: {e}")
+            return entry['body'] if entry is not None else None
+
+        self.misses += 1
+        self._store(url, {'etag': r.headers.get('ETag'), 'modified': r.headers.get('Last-Modified'),
+                          'checked': time.time(), 'body': body})
+        Debug.logger.debug(f"Metadata cache stored {url} ({self._stats()})")
+        return body
+
+
+    def peek(self, url:str) -> Any:
+        """ The cached body of url however old it is, without any request """
+        with self._lock:
+            entry:dict|None = self._load().get(url)
+        return entry['body'] if entry is not None else None
+
+
+    def _stats(self) -> str:
+        return f"hits={self.hits} misses={self.misses}"
+
+
+    def _store(self, url:str, entry:dict) -> None:
+        with self._lock:
+            self._load()[url] = entry
+            try:
+                os.makedirs(path.dirname(self.file), exist_ok=True)
+                with open(self.file + '.tmp', 'w') as f:
+                    json.dump(self._entries, f)
+                os.replace(self.file + '.tmp', self.file)
+            except OSError as e:
+                Debug.logger.debug(f"Metadata cache not saved: {e}")
+
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            if path.exists(self.file):
+                try:
+                    with open(self.file) as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    Debug.logger.debug(f"Metadata cache unreadable, starting afresh: {e}")
+        return self._entries
@@ -1,27 +1,99 @@
+import os
+
 NAME="Navl's Neutron Dancer"
 
+# The services we talk to can be pointed elsewhere, e.g. at benchmarks/standin.py, by setting
+# NEUTRONDANCER_SPANSH to replace https://spansh.co.uk/api and NEUTRONDANCER_GITHUB to serve
+# github.com, <base>/raw for raw.githubusercontent.com and <base>/api for api.github.com
+GIT_BASE:str = os.environ.get('NEUTRONDANCER_GITHUB', '').rstrip('/')
+GIT_WEB:str = GIT_BASE or "https://github.com"
+GIT_RAW:str = f"{GIT_BASE}/raw" if GIT_BASE else "https://raw.githubusercontent.com"
+GIT_API:str = f"{GIT_BASE}/api" if GIT_BASE else "https://api.github.com"
+
 GIT_USER="dwomble"
 GIT_PROJECT="EDMC-NeutronDancer"
-GIT_LATEST:str = f"https://github.com/{GIT_USER}/{GIT_PROJECT}/releases/latest"
-GIT_DOWNLOAD:str = f"https://github.com/{GIT_USER}/{GIT_PROJECT}/releases/download"
-GIT_VERSION:str = f"https://raw.githubusercontent.com/{GIT_USER}/{GIT_PROJECT}/master/version"
-GIT_CHANGELOG_LIST:str = f"https://api.github.com/repos/{GIT_USER}/{GIT_PROJECT}/releases/latest"
-GIT_CHANGELOG:str = f"https://github.com/{GIT_USER}/{GIT_PROJECT}/blob/master/CHANGELOG.md#"
+GIT_LATEST:str = f"{GIT_WEB}/{GIT_USER}/{GIT_PROJECT}/releases/latest"
+GIT_DOWNLOAD:str = f"{GIT_WEB}/{GIT_USER}/{GIT_PROJECT}/releases/download"
+GIT_VERSION:str = f"{GIT_RAW}/{GIT_USER}/{GIT_PROJECT}/master/version"
+GIT_CHANGELOG_LIST:str = f"{GIT_API}/repos/{GIT_USER}/{GIT_PROJECT}/releases/latest"
+GIT_CHANGELOG:str = f"{GIT_WEB}/{GIT_USER}/{GIT_PROJECT}/blob/master/CHANGELOG.md#"
 
-SPANSH_API:str = "https://spansh.co.uk/api"
+SPANSH_API:str = os.environ.get('NEUTRONDANCER_SPANSH', '').rstrip('/') or "https://spansh.co.uk/api"
 SPANSH_ROUTE:str = f"{SPANSH_API}/route"
 SPANSH_RESULTS:str = f"{SPANSH_API}/results"
 
+SPANSH_SYSTEMS:str = f"{SPANSH_API}/systems"
+
+# Shared HTTP client
+HTTP_TIMEOUT:tuple = (5, 10)    # Default (connect, read) timeout in seconds
+HTTP_POOL_SIZE:int = 4          # Keep-alive connections kept per host
+HTTP_RETRIES:int = 2            # Retries of idempotent requests on connection errors and 5xx
+HTTP_BACKOFF:float = 0.5        # Backoff factor between those retries
+
+# Autocomplete
+AC_DEBOUNCE:int = 250       # Milliseconds to wait after a keystroke before querying
+AC_CACHE_SIZE:int = 200     # Prefixes kept in the autocomplete cache
+AC_MAX_RESULTS:int = 10     # Lists shorter than this from Spansh are taken to hold every match
+
+# Polling of Spansh route jobs (seconds)
+POLL_FIRST:float = 0.25     # First check, short routes are often ready almost immediately
+POLL_FACTOR:float = 2.0     # Exponential backoff multiplier
+POLL_MAX:float = 5.0        # Longest gap between checks
+POLL_JITTER:float = 0.2     # +/- fraction of random jitter applied to each wait
+POLL_DEADLINE:float = 180.0 # Give up on the job after this long
+
 # Directory we store our save data in
 DATA_DIR = 'data'
 
+# Seconds to wait for further changes before writing state to disk
+SAVE_DELAY:float = 2.0
+# Compression for the saved route table: 'none' (memory mappable), 'zlib' or 'lzma' (smallest, slowest)
+ROUTE_CODEC:str = 'zlib'
+
+# When we're off the route only pick it up again from a position within this many ly of it
+RESYNC_DISTANCE:float = 500.0
+
+# Version and release metadata cache, stored in DATA_DIR
+HTTP_CACHE_FILE:str = 'http.json'
+HTTP_RECHECK:float = 6 * 3600   # Seconds before cached metadata is checked with the server again
+
+# Updates, the state of the download is kept in DATA_DIR and downloads in a directory there
+UPDATE_FILE:str = 'update.json'
+UPDATE_DIR:str = 'updates'
+UPDATE_CHUNK:int = 64 * 1024    # Bytes read and written at a time when downloading and unpacking
+
+# Local system name index, stored in DATA_DIR
+SYSTEMS_FILE:str = 'systems.txt'
+SYSTEMS_INSERT_MAX:int = 2   # Names added since the last search inserted in place, more are merged on a worker
+
+# Route cache, stored in DATA_DIR
+CACHE_DIR:str = 'cache'
+CACHE_MAX_BYTES:int = 50 * 1024 * 1024  # LRU eviction once the cache exceeds this
+CACHE_TTL:float|None = 30 * 24 * 3600   # Seconds before a cached route is replotted, None to keep forever
+
 # Map from returned data to our header names
 HEADER_MAP:dict = {"System Name": "system", "Distance Jumped": "distance_jumped", "Distance Remaining": "distance_left",
-               "Jumps": "jumps", "Neutron": "neutron_star"}
+               "Jumps": "jumps", "Neutron": "neutron_star", "X": "x", "Y": "y", "Z": "z"}
 # Headers that we accept
 HEADERS:list = ["System Name", "Jumps", "Neutron", "Body Name", "Body Subtype",
                 "Is Terraformable", "Distance To Arrival", "Estimated Scan Value", "Estimated Mapping Value",
-                "Distance", "Distance Jumped", "Distance Remaining", "Fuel Used", "Icy Ring", "Pristine", "Restock Tritium"]
+                "Distance", "Distance Jumped", "Distance Remaining", "Fuel Used", "Icy Ring", "Pristine", "Restock Tritium",
+                "X", "Y", "Z"]
+# Type of each header's values
+COLUMN_TYPES:dict = {
+    "System Name": str, "Jumps": int, "Neutron": bool, "Body Name": list, "Body Subtype": list,
+    "Is Terraformable": bool, "Distance To Arrival": float, "Estimated Scan Value": float,
+    "Estimated Mapping Value": float, "Distance": float, "Distance Jumped": float,
+    "Distance Remaining": float, "Fuel Used": float, "Icy Ring": bool, "Pristine": bool, "Restock Tritium": bool,
+    "X": float, "Y": float, "Z": float,
+}
+# Road to riches columns that describe a body, each waypoint holds a list of them, one per body in the system
+BODY_COLUMNS:list = ["Body Name", "Body Subtype", "Is Terraformable", "Distance To Arrival",
+                     "Estimated Scan Value", "Estimated Mapping Value"]
+# Other names used for our headers, e.g. in Spansh csv exports
+COLUMN_ALIASES:dict = {"Neutron Star": "Neutron"}
+# Waypoint coordinate headers, kept for finding our place on the route but not displayed
+COORDINATES:list = ["X", "Y", "Z"]
 
 # Headers
 hdrs:dict = {
@@ -40,6 +112,15 @@ lbls:dict = {
     "body_count": "Bodies to scan at",
     "restock_tritium": "Time to restock Tritium",
     "plot_error": "Error while trying to plot a route, please try again.",
+    "no_response": "No response from Spansh, please try again.",
+    "plot_submitting": "Sending route to Spansh…",
+    "plot_waiting": "Waiting for Spansh… ({n})",
+    "systems_importing": "Importing system names…",
+    "systems_imported": "Imported {n} system names",
+    "systems_import_error": "Couldn't read system names from that file.",
+    "import_error": "Unable to import that file, it isn't a route we understand.",
+    "import_progress": "Importing… {n} waypoints ({pct}%)",
+    "plot_timeout": "Spansh took too long to plot the route, please try again.",
     "source_system": "Source System",
     "dest_system": "Destination System",
     "range": "Range (LY)",
@@ -61,6 +142,8 @@ tts:dict = {
     "range": "Ship jump range in light years, right click for menu",
     "efficiency": "Routing efficiency (%)",
     "jump": "Click to copy to clipoard.\nJumps remaining in route",
+    "distance_left": "Distance remaining {d} ly",
+    "fuel_left": "Fuel still to use {f} t",
 }
 
 # Button names
@@ -72,6 +155,7 @@ btns:dict = {
     "calculate_route": "Calculate",
     "cancel": "Cancel",
     "import_file": "Import file",
+    "import_systems": "Import systems",
     "export_route": "Export for TCE",
     "clear_route": "Clear route",
     "show_route": "Show route",
@@ -4,7 +4,6 @@ from os import path
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from semantic_version import Version # type: ignore
 from typing import TYPE_CHECKING
 
 from config import appname  # type: ignore
@@ -14,6 +13,7 @@ if TYPE_CHECKING:
     from .router import Router
     from .ui import UI
     from .updater import Updater
+    from .systems import SystemIndex
 @dataclass
 class Context:
     # plugin parameters
@@ -25,3 +25,4 @@ class Context:
     router:'Router' = None
     ui:'UI' = None
     updater:'Updater' = None
+    systems:'SystemIndex' = None
@@ -1,73 +1,76 @@
-import ast
 import csv
 import os
+import threading
 from pathlib import Path
 from tkinter import filedialog
-import re
+from typing import Callable
 
-from utils.Debug import Debug, catch_exceptions
+from utils.Debug import Debug
+from .constants import lbls
 from .context import Context
+from .ingest import Ingested, IngestCancelled, ingest, csv_reader
 
-# Headers that we accept
-HEADERS:list = ["System Name", "Jumps", "Neutron Star", "Body Name", "Body Subtype",
-                "Is Terraformable", "Distance To Arrival", "Estimated Scan Value", "Estimated Mapping Value",
-                "Distance", "Distance Jumped", "Distance Remaining", "Fuel Used", "Icy Ring", "Pristine", "Restock Tritium"]
 
-class csv_handler:
-    """ Handle csv import/export, not currently used """
-
-    @catch_exceptions
-    def import_csv(self, filepath:Path|str, clear_previous_route:bool = True):
-        """ Import a csv file """
-        ftypes = [
-            ('All supported files', '*.csv *.txt'),
-            ('CSV files', '*.csv'),
-            ('Text files', '*.txt'),
-        ]
-        filename:str = filedialog.askopenfilename(filetypes=ftypes, initialdir=os.path.expanduser('~'))
+class CSVImport(threading.Thread):
+    """
+    Background csv route importer, streams the file through the ingestion pipeline.
+    Progress is reported by calling listener(job, kind, payload) from the worker thread:
+        ('progress', str)       status text
+        ('done', Ingested)      the imported route
+        ('error', str)          error text to display
+        ('cancelled', None)     the import was cancelled
+    """
+    def __init__(self, filename:Path|str, listener:Callable|None = None) -> None:
+        super().__init__(name="NeutronDancer-csv", daemon=True)
+        self.filename:Path|str = filename
+        self.listener:Callable|None = listener
+        self.cancelled:threading.Event = threading.Event()
 
-        if len(filename) == 0:
-            Debug.logger.debug(f"No filename selected")
-            return
 
-        with open(filepath, 'r', encoding='utf-8-sig', newline='') as csvfile:
-            self.roadtoriches = False
-            self.fleetcarrier = False
+    def cancel(self) -> None:
+        self.cancelled.set()
 
-            if clear_previous_route:
-                Context.router.clear_route()
 
-            route_reader = csv.DictReader(csvfile)
-            # Check it has column headings
-            if not route_reader.fieldnames:
-                Debug.logger.error(f"File {filepath} is empty or does't have a header row")
-                return
+    def _post(self, message:tuple) -> None:
+        if self.listener is not None:
+            self.listener(self, *message)
+
 
-            hdrs:list = list(set(HEADERS).intersection(set(route_reader.fieldnames)))
-            if hdrs == [] or "System Name" not in hdrs:
-                Debug.logger.error(f"File {filepath} is of unsupported format")
+    def run(self) -> None:
+        try:
+            result:Ingested|None = self._read()
+            if result is None:
+                Debug.logger.error(f"File {self.filename} is empty or of unsupported format")
+                self._post(('error', lbls["import_error"]))
                 return
+            Debug.logger.debug(f"Imported {len(result.table)} rows, headers: {result.headers}")
+            self._post(('done', result))
+        except IngestCancelled:
+            self._post(('cancelled', None))
+        except Exception as e:
+            Debug.logger.error("Failed to import csv route, exception info:", exc_info=e)
+            self._post(('error', lbls["import_error"]))
 
-            route:list = []
-            for row in route_reader:
-                r:list = []
-                if row not in (None, "", []): continue
-                for col in hdrs:
-                    if col in row:
-                        if col in ["body_name", "body_subtype"]:
-                            r.append(ast.literal_eval(row[col]))
-                            continue
-                        m = re.match(r"^\d+(\.\d+)?$", row[col])
-                        Debug.logger.debug(f"Row {row[col]} {m}")
-                        r.append(row[col] if not re.match(r"^\d+(\.\d+)?$", row[col]) else round(float(row[col]), 2))
-                route.append(r)
-
-            self.fleetcarrier = True if "Fuel Used" in hdrs else False
-            self.roadtoriches = True if "Estimated Scan Value" in hdrs else False
-            Debug.logger.debug(f"Headers: {hdrs} rows {len(route)}")
-            self.headers = hdrs
-            self.route = route
 
+    def _read(self) -> Ingested|None:
+        size:int = max(os.path.getsize(self.filename), 1)
+        read:list = [0]
+
+        def lines(f):
+            """ Count characters as they're read for progress reporting """
+            for line in f:
+                read[0] += len(line)
+                yield line
+
+        def progress(rows:int) -> None:
+            self._post(('progress', lbls["import_progress"].format(n=rows, pct=min(100, int(read[0] * 100 / size)))))
+
+        with open(self.filename, 'r', encoding='utf-8-sig', newline='') as csvfile:
+            return ingest(*csv_reader(lines(csvfile)), progress=progress, cancelled=self.cancelled.is_set)
+
+
+class csv_handler:
+    """ Handle csv export, not currently used """
 
     def export_route(self) -> None:
         """ Export the route as a csv """
@@ -0,0 +1,161 @@
+from array import array
+from itertools import product
+from math import floor, dist
+
+from .constants import RESYNC_DISTANCE
+
+np = None           # numpy, imported by the first build rather than when the plugin loads
+_numpy:bool|None = None
+
+
+def _has_numpy() -> bool:
+    """ Import numpy if we can, EDMC doesn't bundle it and everything works without it """
+    global np, _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy = np is not None
+    return _numpy
+
+
+class RouteGeometry:
+    """
+    Waypoint coordinates, for finding where we are on the route when we're not at a waypoint.
+    Waypoints are bucketed into a grid with cells twice the resync distance, so every segment
+    that passes within that distance of a position has an end in one of the 27 cells around it.
+    Only those few segments, plus any too long for the grid, are searched, with numpy when it's
+    available to build the grid and measure the candidates.
+    """
+    __slots__ = ('_x', '_y', '_z', '_cell', '_grid', '_long', '_n')
+
+    def __init__(self) -> None:
+        self.clear()
+
+
+    def clear(self) -> None:
+        self._x = self._y = self._z = None
+        self._cell:float = RESYNC_DISTANCE * 2
+        self._grid:dict = {}
+        self._long:list = []        # Segments too long to be found through the grid
+        self._n:int = 0
+
+
+    def build(self, xs:array, ys:array, zs:array) -> None:
+        """ Index the route from its coordinate columns """
+        self.clear()
+        self._n = len(xs)
+        if _has_numpy():
+            self._build_numpy(xs, ys, zs)
+        else:
+            self._build_python(xs, ys, zs)
+
+
+    def _build_python(self, xs:array, ys:array, zs:array) -> None:
+        self._x, self._y, self._z = xs, ys, zs
+        cell:float = self._cell
+        grid:dict = self._grid
+        for i, p in enumerate(zip(xs, ys, zs)):
+            grid.setdefault((floor(p[0] / cell), floor(p[1] / cell), floor(p[2] / cell)), []).append(i)
+            if i and dist(p, (xs[i-1], ys[i-1], zs[i-1])) > cell - RESYNC_DISTANCE:
+                self._long.append(i)
+
+
+    def _build_numpy(self, xs:array, ys:array, zs:array) -> None:
+        self._x, self._y, self._z = (np.frombuffer(c, dtype=np.float64) if isinstance(c, array) and c.typecode == 'd' else np.asarray(c, dtype=np.float64) for c in (xs, ys, zs))
+        if self._n == 0:
+            return
+        pts = np.stack((self._x, self._y, self._z), axis=1)
+        cells = np.floor(pts / self._cell).astype(np.int64)
+        order = np.lexsort(cells.T[::-1])
+        ordered = cells[order]
+        starts = np.flatnonzero(np.any(np.diff(ordered, axis=0) != 0, axis=1)) + 1
+        bounds:list = [0] + starts.tolist() + [self._n]
+        offsets:list = order.tolist()
+        keys = map(tuple, ordered[bounds[:-1]].tolist())
+        self._grid = {k: offsets[bounds[j]:bounds[j+1]] for j, k in enumerate(keys)}
+        lengths = np.sqrt((np.diff(pts, axis=0) ** 2).sum(axis=1))
+        self._long = (np.nonzero(lengths > self._cell - RESYNC_DISTANCE)[0] + 1).tolist()
+
+
+    def nearest(self, pos:list) -> int|None:
+        """
+        Return the offset of the waypoint we've most recently reached from a position, or None if
+        we're further than the resync distance from the route.
+        Being closest to a waypoint counts as having reached it, being closest to the middle of a
+        leg counts as having reached the waypoint at its start.
+        """
+        if self._n == 0:
+            return None
+        cx, cy, cz = (floor(v / self._cell) for v in pos)
+        points:set = set()
+        for key in product((cx-1, cx, cx+1), (cy-1, cy, cy+1), (cz-1, cz, cz+1)):
+            points.update(self._grid.get(key, ()))
+        # Segments are numbered by the offset of the waypoint at their end
+        segments:set = {s for i in points for s in (i, i + 1) if 0 < s < self._n}
+        segments.update(self._long)
+        if points == set() and segments == set():
+            return None
+
+        if np is not None:
+            point, pdist, seg, sdist = self._search_numpy(pos, sorted(points), sorted(segments))
+        else:
+            point, pdist, seg, sdist = self._search_python(pos, points, segments)
+
+        if point is not None and (seg is None or pdist <= sdist + 0.01):
+            return point if pdist <= RESYNC_DISTANCE else None
+        return seg - 1 if sdist <= RESYNC_DISTANCE else None
+
+
+    def _search_python(self, pos:list, points:set, segments:set) -> tuple:
+        px, py, pz = pos
+        xs, ys, zs = self._x, self._y, self._z
+        point:int|None = None
+        pbest:float = float('inf')
+        for i in points:
+            d:float = (xs[i] - px) ** 2 + (ys[i] - py) ** 2 + (zs[i] - pz) ** 2
+            if d < pbest:
+                point, pbest = i, d
+
+        seg:int|None = None
+        sbest:float = float('inf')
+        for s in segments:
+            ax, ay, az = xs[s-1], ys[s-1], zs[s-1]
+            dx, dy, dz = xs[s] - ax, ys[s] - ay, zs[s] - az
+            length:float = dx * dx + dy * dy + dz * dz
+            t:float = 0.0 if length == 0 else min(1.0, max(0.0, ((px - ax) * dx + (py - ay) * dy + (pz - az) * dz) / length))
+            d = (ax + dx * t - px) ** 2 + (ay + dy * t - py) ** 2 + (az + dz * t - pz) ** 2
+            if d < sbest:
+                seg, sbest = s, d
+        return point, pbest ** 0.5, seg, sbest ** 0.5
+
+
+    def _search_numpy(self, pos:list, points:list, segments:list) -> tuple:
+        p = np.asarray(pos, dtype=np.float64)
+        point:int|None = None
+        pdist:float = float('inf')
+        if points:
+            i = np.asarray(points)
+            d = (self._x[i] - p[0]) ** 2 + (self._y[i] - p[1]) ** 2 + (self._z[i] - p[2]) ** 2
+            j = int(d.argmin())
+            point, pdist = points[j], float(d[j]) ** 0.5
+
+        seg:int|None = None
+        sdist:float = float('inf')
+        if segments:
+            s = np.asarray(segments)
+            ax, ay, az = self._x[s-1], self._y[s-1], self._z[s-1]
+            dx, dy, dz = self._x[s] - ax, self._y[s] - ay, self._z[s] - az
+            ex, ey, ez = p[0] - ax, p[1] - ay, p[2] - az
+            length = dx * dx + dy * dy + dz * dz
+            t = np.clip((ex * dx + ey * dy + ez * dz) / np.where(length == 0, 1.0, length), 0.0, 1.0)
+            d = (ex - dx * t) ** 2 + (ey - dy * t) ** 2 + (ez - dz * t) ** 2
+            j = int(d.argmin())
+            seg, sdist = segments[j], float(d[j]) ** 0.5
+        return point, pdist, seg, sdist
+
+
+    def __len__(self) -> int:
+        return self._n
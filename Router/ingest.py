@@ -0,0 +1,168 @@
+"""
+Route ingestion pipeline.
+Every route source (Spansh results, csv files, EDTS text, our own cache) is a reader that
+returns the field names it provides and an iterable of rows aligned with them. ingest()
+compiles a typed schema from those fields once and builds the route table and waypoint index
+in a single pass over the rows.
+"""
+import re
+from array import array
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Callable, Iterable
+
+from .constants import HEADERS, HEADER_MAP, COLUMN_TYPES, COLUMN_ALIASES, BODY_COLUMNS
+from .route import RouteTable, WaypointIndex
+
+PROGRESS_ROWS:int = 5000
+
+
+def _to_str(v) -> str:
+    return v.strip() if isinstance(v, str) else str(v)
+
+
+def _to_int(v) -> int:
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return int(float(v)) if v not in ('', None) else 0
+
+
+def _to_float(v) -> float:
+    try:
+        return round(float(v), 2)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _to_bool(v) -> bool:
+    if isinstance(v, bool): return v
+    return str(v).strip().lower() in ('yes', 'true', '1')
+
+
+def _to_list(v) -> list:
+    if isinstance(v, list): return v
+    if v.startswith('['): # Older exports hold a python list per system
+        import ast
+        return ast.literal_eval(v)
+    return [v] if v else []
+
+
+CONVERTERS:dict = {str: _to_str, int: _to_int, float: _to_float, bool: _to_bool, list: _to_list}
+KINDS:dict = {str: RouteTable.STR, int: RouteTable.INT, float: RouteTable.FLOAT, bool: RouteTable.BOOL, list: RouteTable.OBJ}
+
+
+def _per_body(conv:Callable) -> Callable:
+    """ Converter for a body column, its values are gathered into a list per system """
+    return lambda v: [conv(x) for x in v] if isinstance(v, list) else [conv(v)]
+
+
+class Schema:
+    """ The columns we keep from a source, compiled once from the fields it provides """
+    def __init__(self, fields:list) -> None:
+        names:list = [COLUMN_ALIASES.get(f.strip(), f.strip()) for f in fields]
+        self.headers:list = [h for h in HEADERS if h in names]
+        self.positions:list = [names.index(h) for h in self.headers]
+        self.types:list = [COLUMN_TYPES.get(h, str) for h in self.headers]
+        # Road to riches files have a row per body, consecutive rows for a system are merged with
+        # every body column holding a value per body. Neutron routes have some of the same columns,
+        # a body name is what marks a file as having a row per body.
+        self.grouped:bool = "Body Name" in self.headers
+        self.bodies:list = [self.grouped and h in BODY_COLUMNS for h in self.headers]
+        self.converters:list = [_per_body(CONVERTERS[t]) if body and t != list else CONVERTERS[t]
+                                for t, body in zip(self.types, self.bodies)]
+        self.kinds:list = [RouteTable.OBJ if body else KINDS[t] for t, body in zip(self.types, self.bodies)]
+        self.system:int = self.headers.index("System Name") if "System Name" in self.headers else -1
+
+
+    def valid(self) -> bool:
+        return self.system >= 0
+
+
+@dataclass
+class Ingested:
+    """ Everything built from a route source """
+    headers:list
+    table:RouteTable
+    index:WaypointIndex
+
+
+class IngestCancelled(Exception):
+    """ Raised when the caller cancels an ingest in progress """
+
+
+def ingest(fields:list, rows:Iterable, progress:Callable|None = None, cancelled:Callable|None = None) -> Ingested|None:
+    """
+    Build a route from a reader's fields and rows, returning None if the source isn't a route.
+    progress(rows) is called every PROGRESS_ROWS rows, at which point cancelled() is also checked.
+    """
+    schema:Schema = Schema(fields)
+    if not schema.valid():
+        return None
+
+    columns:list = [[] if k in (RouteTable.STR, RouteTable.OBJ) else array(k) for k in schema.kinds]
+    compiled:list = list(zip(schema.positions, schema.converters, columns))
+    grouped:list = [c for c, body in zip(compiled, schema.bodies) if body]
+    names:list = columns[schema.system]
+    source_system:int = schema.positions[schema.system]
+    index:WaypointIndex = WaypointIndex()
+    count:int = 0
+
+    for row in rows:
+        if not row:
+            continue
+        width:int = len(row)
+        if schema.grouped and count and _to_str(row[source_system]) == names[-1]:
+            for pos, conv, col in grouped:
+                col[-1].extend(conv(row[pos] if pos < width else ''))
+            continue
+        for pos, conv, col in compiled:
+            col.append(conv(row[pos] if pos < width else ''))
+        index.add(names[-1], count)
+        count += 1
+        if count % PROGRESS_ROWS == 0:
+            if cancelled is not None and cancelled():
+                raise IngestCancelled()
+            if progress is not None:
+                progress(count)
+
+    if count == 0:
+        return None
+    return Ingested(schema.headers, RouteTable.from_columns(schema.kinds, columns), index)
+
+
+def spansh_reader(system_jumps:list) -> tuple[list, Iterable]:
+    """ Reader for the system_jumps of a Spansh route result """
+    if system_jumps == []:
+        return [], []
+    fields:list = [h for h in HEADERS if HEADER_MAP.get(h, '') in system_jumps[0]]
+    get = itemgetter(*[HEADER_MAP[h] for h in fields])
+    if len(fields) == 1:
+        return fields, ((get(wp),) for wp in system_jumps)
+    return fields, map(get, system_jumps)
+
+
+def csv_reader(lines:Iterable) -> tuple[list, Iterable]:
+    """ Reader for a csv file, lines is any iterable of text lines """
+    import csv
+    reader = csv.reader(lines)
+    fields:list|None = next(reader, None)
+    return (fields or []), reader
+
+
+def edts_reader(lines:Iterable) -> tuple[list, Iterable]:
+    """ Reader for EDTS text routes, where each '===' line holds the jumps and one or more systems """
+    def rows():
+        for row in lines:
+            if not row.lstrip().startswith('==='):
+                continue
+            jumps:int = int(re.findall(r"\d+ jump", row)[0].rstrip(' jumps'))
+            for system in row[row.find('>') + 1:].split(','):
+                yield (system.strip(), jumps)
+                jumps = 1
+    return ['System Name', 'Jumps'], rows()
+
+
+def rows_reader(headers:list, rows:list) -> tuple[list, Iterable]:
+    """ Reader for routes we already hold as headers and rows, e.g. cached or older saves """
+    return headers, rows
@@ -0,0 +1,88 @@
+import tkinter as tk
+
+from utils.Debug import Debug, catch_exceptions
+
+from .context import Context
+
+
+class JournalEvents:
+    """
+    Reduce journal events into the changes they make and apply them once Tk is idle.
+    Bursts, such as the catch up when EDMC starts or a jump followed by a supercruise exit,
+    become a single update of the router and a single refresh of the UI.
+    """
+    # Singleton pattern
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, widget:tk.Misc|None = None) -> None:
+        # Only initialize if it's the first time
+        if hasattr(self, '_initialized'): return
+
+        self.widget:tk.Misc|None = widget
+        self.delta:dict = {}        # Latest value of everything changed since we last applied
+        self.ships:dict = {}        # Ship events, applied in the order they last arrived
+        self.events:int = 0         # Events reduced into the pending delta
+        self._scheduled:bool = False
+        self._initialized = True
+
+
+    def add(self, entry:dict, system:str) -> None:
+        """ Fold a journal event into the pending changes """
+        match entry['event']:
+            case 'FSDJump' | 'Location' | 'SupercruiseExit':
+                self.delta['system'] = entry.get('StarSystem', system)
+                if 'StarPos' in entry: # Supercruise exits don't carry it
+                    self.delta['position'] = entry['StarPos']
+            case 'StoredShips':
+                self.delta['shipyard'] = entry.get('ShipsHere', []) + entry.get('ShipsRemote', [])
+            case 'Loadout':
+                self.ships.pop('Loadout', None)
+                self.ships['Loadout'] = (entry.get('ShipID', ''), entry.get('MaxJumpRange', 0.0), entry.get('ShipName', ''), entry.get('Ship', ''))
+            case 'ShipyardSwap':
+                self.ships.pop('ShipyardSwap', None)
+                self.ships['ShipyardSwap'] = (entry.get('ShipID', ''),)
+            case _:
+                return
+        self.events += 1
+        self._schedule()
+
+
+    def _schedule(self) -> None:
+        if self._scheduled:
+            return
+        if self.widget is None: # Nowhere to wait for idle, apply straight away
+            self.apply()
+            return
+        self._scheduled = True
+        self.widget.after_idle(self.apply)
+
+
+    @catch_exceptions
+    def apply(self) -> None:
+        """ Apply everything pending to the router """
+        delta, ships, events = self.delta, self.ships, self.events
+        self.delta, self.ships, self.events = {}, {}, 0
+        self._scheduled = False
+        if events > 1:
+            Debug.logger.debug(f"Applying {events} journal events together")
+
+        router = Context.router
+        if 'shipyard' in delta:
+            router.shipyard = delta['shipyard']
+        for event, args in ships.items():
+            if event == 'Loadout':
+                router.set_ship(*args)
+            else:
+                router.swap_ship(*args)
+
+        if delta.get('system', router.system) != router.system:
+            router.system = delta['system']
+            router.position = delta.get('position')
+            Context.systems.add(router.system)
+            router.update_route()
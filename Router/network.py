@@ -0,0 +1,58 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.Debug import Debug
+
+from .constants import HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_BACKOFF
+from .context import Context
+
+
+class Network(requests.Session):
+    """
+    Shared keep-alive HTTP session used by the router, autocompleter and updater.
+    Connections are pooled per host so autocomplete keystrokes and job polling reuse warm
+    TCP/TLS connections. Every request gets a default timeout, compression and our user agent,
+    idempotent requests are retried with backoff on connection errors and gateway failures.
+    """
+    # Singleton pattern
+    _instance = None
+    _lock:threading.Lock = threading.Lock() # The first requests can come from several threads at once
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+    def __init__(self) -> None:
+        # Only initialize if it's the first time
+        if hasattr(self, '_initialized'): return
+        with Network._lock:
+            if not hasattr(self, '_initialized'):
+                self._setup()
+
+
+    def _setup(self) -> None:
+        super().__init__()
+        retry:Retry = Retry(total=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF, status_forcelist=(500, 502, 504),
+                            allowed_methods=frozenset(['GET', 'HEAD']), respect_retry_after_header=True,
+                            raise_on_status=False)
+        adapter:HTTPAdapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+        self._initialized = True
+
+
+    def request(self, method:str|bytes, url:str|bytes, *args, **kwargs) -> requests.Response:
+        """ Apply our defaults to every request """
+        kwargs.setdefault('timeout', HTTP_TIMEOUT)
+        if Context.plugin_useragent and 'User-Agent' not in (kwargs.get('headers') or {}):
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'User-Agent': Context.plugin_useragent}
+        Debug.logger.debug(f"HTTP {method} {url}")
+        return super().request(method, url, *args, **kwargs)
@@ -0,0 +1,224 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, TYPE_CHECKING
+from email.utils import parsedate_to_datetime
+
+from utils.Debug import Debug
+
+from .constants import lbls, SPANSH_ROUTE, SPANSH_RESULTS, \
+    POLL_FIRST, POLL_FACTOR, POLL_MAX, POLL_JITTER, POLL_DEADLINE
+from .cache import RouteCache
+from .ingest import Ingested, ingest, rows_reader, spansh_reader
+
+# requests is only imported once something is plotted
+if TYPE_CHECKING:
+    import requests
+    from requests import Response
+
+
+class PlotCancelled(Exception):
+    """ Raised inside the worker when the user cancels the plot """
+
+
+class PlotFailed(Exception):
+    """ Raised inside the worker when Spansh rejects the plot """
+
+
+@dataclass
+class PlotStats:
+    """ Per-plot timing counters, logged when the job finishes so polling can be tuned """
+    polls:int = 0           # Number of GET /results calls
+    waited:float = 0.0      # Total time spent sleeping between polls
+    ttfb:float = 0.0        # Time to first byte of the route submission
+    elapsed:float = 0.0     # Wall time from submission to the final result
+
+    def __str__(self) -> str:
+        return f"polls={self.polls} waited={self.waited:.2f}s ttfb={self.ttfb:.3f}s elapsed={self.elapsed:.2f}s"
+
+
+class PollSchedule:
+    """
+    Exponential backoff with jitter bounded by an overall deadline.
+    Server hints (Retry-After) override the computed delay but never the deadline.
+    """
+    def __init__(self, first:float = POLL_FIRST, factor:float = POLL_FACTOR, most:float = POLL_MAX,
+                 jitter:float = POLL_JITTER, deadline:float = POLL_DEADLINE) -> None:
+        self.delay:float = first
+        self.factor:float = factor
+        self.most:float = most
+        self.jitter:float = jitter
+        self.deadline:float = time.monotonic() + deadline
+
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+
+    def next_delay(self, hint:float|None = None) -> float|None:
+        """ Return how long to wait before the next poll, or None if the deadline has passed """
+        if self.remaining() <= 0:
+            return None
+        if hint is not None:
+            delay:float = hint
+        else:
+            delay = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self.delay = min(self.delay * self.factor, self.most)
+        return min(max(delay, 0.0), self.remaining())
+
+
+def retry_hint(response:'Response') -> float|None:
+    """ Extract a Retry-After header, in seconds or as an HTTP date """
+    value:str|None = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class PlotJob(threading.Thread):
+    """
+    Background worker that submits a route to Spansh, polls for the result and parses it.
+    Progress is reported by calling listener(job, kind, payload) from the worker thread:
+        ('progress', str)           status text for the plot frame
+        ('done', Ingested)          the parsed route
+        ('error', str)              error text to display
+        ('cancelled', None)         the job was cancelled before completion
+    """
+    def __init__(self, source:str, dest:str, efficiency:int, range:float, supercharge_mult:int = 4,
+                 cache:RouteCache|None = None, listener:Callable|None = None) -> None:
+        super().__init__(name="NeutronDancer-plot", daemon=True)
+        self.cache:RouteCache|None = cache
+        self.key:str = RouteCache.key(source, dest, efficiency, range, supercharge_mult)
+        self.params:dict = {'from': source, 'to': dest, 'efficiency': efficiency, 'range': range,
+                            'supercharge_multiplier': supercharge_mult}
+        self.listener:Callable|None = listener
+        self.cancelled:threading.Event = threading.Event()
+        self.session:'requests.Session|None' = None
+        self.stats:PlotStats = PlotStats()
+
+
+    def cancel(self) -> None:
+        """ Abort the job, any request in flight is abandoned and its result discarded """
+        Debug.logger.debug(f"Cancelling plot job")
+        self.cancelled.set()
+
+
+    def run(self) -> None:
+        start:float = time.monotonic()
+        try:
+            cached:Ingested|None = self._cached()
+            if cached is not None:
+                self._post(('done', cached))
+                return
+
+            job:str = self._submit()
+            route:list = self._poll(job)
+            self._check_cancelled()
+            result:Ingested|None = ingest(*spansh_reader(route))
+            if result is None:
+                raise PlotFailed(lbls["plot_error"])
+            if self.cache is not None:
+                self.cache.put(self.key, result.headers, result.table.to_rows())
+            self._post(('done', result))
+        except PlotCancelled:
+            self._post(('cancelled', None))
+        except PlotFailed as e:
+            self._post(('error', str(e)))
+        except Exception as e:
+            if self.cancelled.is_set():
+                self._post(('cancelled', None))
+                return
+            Debug.logger.error("Failed to plot route, exception info:", exc_info=e)
+            self._post(('error', lbls["plot_error"]))
+        finally:
+            self.stats.elapsed = time.monotonic() - start
+            Debug.logger.info(f"Plot job finished: {self.stats}")
+
+
+    def _cached(self) -> Ingested|None:
+        """ The route from the cache, an entry that doesn't hold a usable route is dropped and counts as a miss """
+        cached:tuple|None = self.cache.get(self.key) if self.cache is not None else None
+        if cached is None:
+            return None
+        try:
+            result:Ingested|None = ingest(*rows_reader(*cached))
+        except (TypeError, ValueError, IndexError) as e:
+            Debug.logger.debug(f"Route cache entry malformed: {e}")
+            result = None
+        if result is None:
+            Debug.logger.info(f"Discarding unusable cached route {self.key}")
+            self.cache.discard(self.key)
+        return result
+
+
+    def _post(self, message:tuple) -> None:
+        if self.listener is not None:
+            self.listener(self, *message)
+
+
+    def _check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise PlotCancelled()
+
+
+    def _submit(self) -> str:
+        """ Submit the route request and return the job id """
+        self._post(('progress', lbls["plot_submitting"]))
+        from .network import Network
+        self.session = Network()
+        results:'Response' = self.session.post(SPANSH_ROUTE, params=self.params)
+        self.stats.ttfb = results.elapsed.total_seconds()
+        self._check_cancelled()
+        if results.status_code != 202:
+            raise PlotFailed(error_text(results))
+        return json.loads(results.content)["job"]
+
+
+    def _poll(self, job:str) -> list:
+        """ Poll for the job results until they're ready or the deadline passes """
+        results_url:str = f"{SPANSH_RESULTS}/{job}"
+        schedule:PollSchedule = PollSchedule()
+        hint:float|None = None
+        while True:
+            delay:float|None = schedule.next_delay(hint)
+            if delay is None:
+                Debug.logger.info(f"Route job {job} did not complete before the deadline")
+                raise PlotFailed(lbls["plot_timeout"])
+            # Wait on the cancel event rather than sleeping so cancel is immediate
+            if self.cancelled.wait(delay):
+                raise PlotCancelled()
+            self.stats.waited += delay
+
+            self.stats.polls += 1
+            Debug.logger.debug(f"Checking for route results, try {self.stats.polls} after {delay:.2f}s")
+            self._post(('progress', lbls["plot_waiting"].format(n=self.stats.polls)))
+            route_response:'Response' = self.session.get(results_url, timeout=(5, min(10, max(schedule.remaining(), 1))))
+            self._check_cancelled()
+            # Still running, or the server asked us to slow down
+            if route_response.status_code in (202, 429, 503):
+                hint = retry_hint(route_response)
+                continue
+            if route_response.status_code != 200:
+                raise PlotFailed(error_text(route_response))
+            return json.loads(route_response.content)["result"]["system_jumps"]
+
+
+def error_text(response:'Response|None') -> str:
+    """ Parse the response from Spansh on a failed route query """
+    if response is None:
+        return lbls["no_response"]
+    try:
+        if response.status_code == 400 and "error" in json.loads(response.content):
+            return json.loads(response.content)["error"]
+    except ValueError:
+        pass
+    return lbls["plot_error"]
@@ -0,0 +1,327 @@
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate, pairwise
+
+
+class WaypointIndex:
+    """
+    Map of system name to the route offsets it appears at, so journal events can find
+    where we are on the route without scanning it.
+    """
+    __slots__ = ('_offsets',)
+
+    def __init__(self, names:list|None = None) -> None:
+        self._offsets:dict = {}
+        if names is not None:
+            self.build(names)
+
+
+    def build(self, names) -> None:
+        """ Rebuild the index from an iterable of system names in route order """
+        offsets:dict = {}
+        for i, name in enumerate(names):
+            offsets.setdefault(name, []).append(i)
+        self._offsets = offsets
+
+
+    def add(self, name:str, offset:int) -> None:
+        """ Record a system at an offset, offsets must be added in increasing order """
+        positions:list|None = self._offsets.get(name)
+        if positions is None:
+            self._offsets[name] = [offset]
+        else:
+            positions.append(offset)
+
+
+    def clear(self) -> None:
+        self._offsets = {}
+
+
+    def find(self, name:str, offset:int = 0) -> int|None:
+        """
+        Return the offset of a system on the route or None if it isn't on it.
+        Systems that appear more than once resolve to the nearest occurrence at or after
+        offset, falling back to the closest one before it.
+        """
+        positions:list|None = self._offsets.get(name)
+        if positions is None:
+            return None
+        if len(positions) == 1:
+            return positions[0]
+        i:int = bisect_left(positions, offset)
+        return positions[i] if i < len(positions) else positions[-1]
+
+
+    def __contains__(self, name:str) -> bool:
+        return name in self._offsets
+
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+
+class RouteTotals:
+    """
+    Running totals of the route's additive columns, built once per route, so what's been
+    covered and what's left at any offset is a subtraction rather than a sum over the route.
+    Values are counted against the waypoint being travelled to, so at offset the remaining
+    total includes the leg to that waypoint.
+    """
+    __slots__ = ('_sums',)
+
+    # Columns holding a value per leg
+    LEGS:tuple = ("Jumps", "Distance Jumped", "Fuel Used")
+    # Columns holding the distance still to go from each waypoint
+    COUNTDOWNS:tuple = ("Distance Remaining",)
+
+    def __init__(self) -> None:
+        self._sums:dict = {}
+
+
+    def build(self, headers:list, table:'RouteTable') -> None:
+        """ Rebuild the totals from a route table """
+        sums:dict = {}
+        for h in self.LEGS + self.COUNTDOWNS:
+            if h not in headers:
+                continue
+            values = table.raw(headers.index(h))
+            if h in self.COUNTDOWNS: # Turn the distance to go into the length of each leg
+                values = [0] + [a - b for a, b in pairwise(values)] if len(values) else []
+            sums[h] = array('q' if table.kinds[headers.index(h)] == RouteTable.INT else 'd', accumulate(values, initial=0))
+        self._sums = sums
+
+
+    def clear(self) -> None:
+        self._sums = {}
+
+
+    def elapsed(self, header:str, offset:int) -> int|float:
+        """ Total of a column over the legs before the waypoint at offset """
+        sums:array|None = self._sums.get(header)
+        if sums is None:
+            return 0
+        return self._round(sums[min(max(offset, 0), len(sums) - 1)])
+
+
+    def remaining(self, header:str, offset:int) -> int|float:
+        """ Total of a column over the legs from the waypoint at offset to the end """
+        sums:array|None = self._sums.get(header)
+        if sums is None:
+            return 0
+        return self._round(sums[-1] - sums[min(max(offset, 0), len(sums) - 1)])
+
+
+    def total(self, header:str) -> int|float:
+        sums:array|None = self._sums.get(header)
+        return self._round(sums[-1]) if sums is not None else 0
+
+
+    @staticmethod
+    def _round(value:int|float) -> int|float:
+        # Float sums drift, keep to the two places the columns are stored with
+        return value if isinstance(value, int) else round(value, 2)
+
+
+    def __contains__(self, header:str) -> bool:
+        return header in self._sums
+
+
+class RouteRow:
+    """ Lightweight view of one row of a RouteTable, behaves like the list it replaces """
+    __slots__ = ('_table', '_i')
+
+    def __init__(self, table:'RouteTable', i:int) -> None:
+        self._table:RouteTable = table
+        self._i:int = i
+
+
+    def __getitem__(self, c:int):
+        return self._table.cell(self._i, c)
+
+
+    def __len__(self) -> int:
+        return self._table.width
+
+
+    def __iter__(self):
+        for c in range(self._table.width):
+            yield self._table.cell(self._i, c)
+
+
+    def __eq__(self, other) -> bool:
+        return list(self) == list(other)
+
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class RouteTable:
+    """
+    Columnar store for route rows.
+    Numeric columns live in typed arrays and system/body names are interned, so very long
+    routes take a fraction of the memory of a list of lists. Rows are read through RouteRow
+    views so existing route[offset][column] access keeps working.
+    """
+    __slots__ = ('_columns', '_kinds', '_len', '_loader')
+
+    # Column kinds: array typecodes for numbers, 's' for interned strings and 'o' for anything else
+    BOOL:str = 'b'
+    INT:str = 'q'
+    FLOAT:str = 'd'
+    STR:str = 's'
+    OBJ:str = 'o'
+
+    def __init__(self, rows:list|None = None) -> None:
+        self._columns:list = []
+        self._kinds:list = []
+        self._len:int = 0
+        self._loader = None
+        if rows:
+            self._build(rows)
+
+
+    @classmethod
+    def lazy(cls, kinds:list, length:int, loader) -> 'RouteTable':
+        """ Create a table whose columns are only fetched, via loader(c), the first time they're used """
+        table:RouteTable = cls()
+        table._kinds = list(kinds)
+        table._columns = [None] * len(kinds)
+        table._len = length
+        table._loader = loader
+        return table
+
+
+    @classmethod
+    def from_columns(cls, kinds:list, columns:list) -> 'RouteTable':
+        """ Create a table from columns that are already in their stored form """
+        table:RouteTable = cls()
+        table._kinds = list(kinds)
+        table._columns = [[sys.intern(v) for v in col] if k == cls.STR else col for k, col in zip(kinds, columns)]
+        table._len = len(columns[0]) if columns else 0
+        return table
+
+
+    @property
+    def kinds(self) -> list:
+        return self._kinds
+
+
+    def _fetch(self, c:int) -> array|list:
+        """ Load a column that hasn't been read yet """
+        self._columns[c] = self._loader(c)
+        if all(col is not None for col in self._columns):
+            self._loader = None
+        return self._columns[c]
+
+
+    def raw(self, c:int) -> array|list:
+        """ Return a column in its stored form """
+        col = self._columns[c]
+        return col if col is not None else self._fetch(c)
+
+
+    @property
+    def width(self) -> int:
+        return len(self._columns)
+
+
+    def _build(self, rows:list) -> None:
+        """ Infer a type for each column then fill it in one pass """
+        width:int = max(len(r) for r in rows)
+        for c in range(width):
+            values:list = [r[c] if c < len(r) else None for r in rows]
+            kind:str = self._infer(values)
+            self._kinds.append(kind)
+            self._columns.append(self._make(kind, values))
+        self._len = len(rows)
+
+
+    @classmethod
+    def _infer(cls, values:list) -> str:
+        kinds:set = {cls._kind_of(v) for v in values}
+        if len(kinds) == 1:
+            return kinds.pop()
+        if kinds <= {cls.INT, cls.FLOAT}:
+            return cls.FLOAT
+        return cls.OBJ
+
+
+    @classmethod
+    def _kind_of(cls, value) -> str:
+        if isinstance(value, bool): return cls.BOOL
+        if isinstance(value, int): return cls.INT
+        if isinstance(value, float): return cls.FLOAT
+        if isinstance(value, str): return cls.STR
+        return cls.OBJ
+
+
+    @classmethod
+    def _make(cls, kind:str, values:list) -> array|list:
+        match kind:
+            case cls.STR:
+                return [sys.intern(v) for v in values]
+            case cls.OBJ:
+                return list(values)
+            case _:
+                return array(kind, values)
+
+
+    def append(self, row:list) -> None:
+        """ Add a row, widening a column's type if the new value doesn't fit it """
+        if self._len == 0 and self._columns == []:
+            self._build([row])
+            return
+        for c, value in enumerate(row[:len(self._columns)]):
+            kind:str = self._kinds[c]
+            new:str = self._kind_of(value)
+            if new != kind:
+                widened:str = self.FLOAT if {kind, new} <= {self.INT, self.FLOAT} else self.OBJ
+                if widened != kind:
+                    self._columns[c] = self._make(widened, list(self.column(c)))
+                    self._kinds[c] = widened
+                    kind = widened
+            self.raw(c).append(sys.intern(value) if kind == self.STR else value)
+        self._len += 1
+
+
+    def column(self, c:int) -> array|list:
+        """ Return a whole column, bool columns are returned as bools """
+        if self._kinds[c] == self.BOOL:
+            return [bool(v) for v in self.raw(c)]
+        return self.raw(c)
+
+
+    def cell(self, i:int, c:int):
+        col = self._columns[c]
+        value = (col if col is not None else self._fetch(c))[i]
+        return bool(value) if self._kinds[c] == self.BOOL else value
+
+
+    def to_rows(self) -> list:
+        """ Return the table as a list of lists, suitable for serializing """
+        return [list(r) for r in zip(*[self.column(c) for c in range(self.width)])]
+
+
+    def __getitem__(self, i:int) -> RouteRow:
+        if i < 0: i += self._len
+        if i < 0 or i >= self._len:
+            raise IndexError("route index out of range")
+        return RouteRow(self, i)
+
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield RouteRow(self, i)
+
+
+    def __len__(self) -> int:
+        return self._len
+
+
+    def __eq__(self, other) -> bool:
+        # Keeps comparisons like route == [] working
+        if len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
@@ -0,0 +1,95 @@
+import json
+import lzma
+import mmap
+import struct
+import sys
+import uuid
+import zlib
+from array import array
+
+from utils.Debug import Debug
+
+from .route import RouteTable
+
+# File layout:
+#   magic (4 bytes) | version (u8) | header length (u32 little endian) | json header | column blocks
+# The header holds the route headers, row count, and each column's kind, codec, offset and length
+# so a single column can be read and decoded without touching the rest of the file. Uncompressed
+# numeric columns are raw array bytes and can be read straight out of a memory map.
+MAGIC:bytes = b'NDRT'
+VERSION:int = 1
+PREFIX:struct.Struct = struct.Struct('<4sBI')
+
+CODECS:dict = {
+    'none': (lambda b: b, lambda b: b),
+    'zlib': (lambda b: zlib.compress(b, 6), zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+
+def _encode(kind:str, values) -> bytes:
+    match kind:
+        case RouteTable.STR:
+            return '\0'.join(values).encode('utf-8')
+        case RouteTable.OBJ:
+            return json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+        case _:
+            return values.tobytes()
+
+
+def _decode(kind:str, data:bytes, length:int, byteorder:str) -> array|list:
+    match kind:
+        case RouteTable.STR:
+            return [sys.intern(s) for s in data.decode('utf-8').split('\0')] if length else []
+        case RouteTable.OBJ:
+            return json.loads(data)
+        case _:
+            values:array = array(kind)
+            values.frombytes(data)
+            if byteorder != sys.byteorder:
+                values.byteswap()
+            return values
+
+
+def encode(headers:list, table:RouteTable, codec:str = 'zlib') -> bytes:
+    """ Serialize a route table, returning the bytes so the caller can write them atomically """
+    compress = CODECS[codec][0]
+    blocks:list = []
+    columns:list = []
+    offset:int = 0
+    for c, kind in enumerate(table.kinds):
+        data:bytes = _encode(kind, table.raw(c))
+        # Compression rarely pays for itself on small columns
+        use:str = codec if len(data) > 512 else 'none'
+        if use != 'none':
+            data = compress(data)
+        columns.append({'kind': kind, 'codec': use, 'offset': offset, 'length': len(data)})
+        blocks.append(data)
+        offset += len(data)
+
+    header:bytes = json.dumps({'id': uuid.uuid4().hex, 'headers': headers, 'rows': len(table),
+                               'byteorder': sys.byteorder, 'columns': columns}).encode('utf-8')
+    return PREFIX.pack(MAGIC, VERSION, len(header)) + header + b''.join(blocks)
+
+
+def read(file:str) -> tuple[list, RouteTable]:
+    """ Read the header of a route file, columns are loaded lazily as the table uses them """
+    with open(file, 'rb') as f:
+        magic, version, size = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC or version > VERSION:
+            raise ValueError(f"{file} is not a route file we understand")
+        header:dict = json.loads(f.read(size))
+    base:int = PREFIX.size + size
+    rows:int = header['rows']
+
+    def load(c:int) -> array|list:
+        col:dict = header['columns'][c]
+        with open(file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if json.loads(mm[PREFIX.size:base]).get('id') != header['id']:
+                    raise ValueError(f"{file} was replaced while its route was in use")
+                data:bytes = mm[base + col['offset']:base + col['offset'] + col['length']]
+        Debug.logger.debug(f"Loaded route column {c} ({col['length']} bytes {col['codec']})")
+        return _decode(col['kind'], CODECS[col['codec']][1](data), rows, header['byteorder'])
+
+    return header['headers'], RouteTable.lazy([c['kind'] for c in header['columns']], rows, load)
@@ -1,15 +1,21 @@
-import json
-from os import path, makedirs
-import re
-import requests
-from requests import Response
+from os import path
 from pathlib import Path
-from time import sleep
+from typing import TYPE_CHECKING
 
 from utils.Debug import Debug, catch_exceptions
 
-from .constants import lbls, HEADERS, HEADER_MAP, DATA_DIR, SPANSH_ROUTE, SPANSH_RESULTS
+from .cache import RouteCache
+from .constants import lbls, DATA_DIR, CACHE_DIR, COORDINATES
 from .context import Context
+from .geometry import RouteGeometry
+from .ingest import Ingested, ingest, edts_reader
+from .plotter import PlotJob
+from .route import RouteTable, RouteTotals, WaypointIndex
+from .storage import Storage
+
+# The csv machinery is only imported when a csv file is first imported
+if TYPE_CHECKING:
+    from .csv import CSVImport
 
 class Router():
     """
@@ -29,12 +35,13 @@ class Router():
         if hasattr(self, '_initialized'): return
 
         self.headers:list = []
-        self.route:list = []
+        self.route:RouteTable = RouteTable()
         self.ships:dict = {}
         self.history:list = []
         self.bodies:str = ""
 
         self.system:str = ""
+        self.position:list|None = None  # Galactic coordinates of system, when the journal has told us
         self.src:str = ""
         self.dest:str = ""
         self.ship_id:str = ""
@@ -43,11 +50,21 @@ class Router():
         self.supercharge_mult:int = 4
         self.efficiency:int = 60
         self.offset:int = 0
-        self.jumps_left:int = 0
         self.next_stop:str = ""
         self.jumps:int = 0
 
         self.shipyard:list = [] # Temporary store of shipyard ships
+        self.plot_job:'PlotJob|CSVImport|None' = None
+        self.cache:RouteCache = RouteCache(path.join(Context.plugin_dir, DATA_DIR, CACHE_DIR))
+        self.index:WaypointIndex = WaypointIndex()
+        self.totals:RouteTotals = RouteTotals()
+        self.geometry:RouteGeometry = RouteGeometry()
+        self.storage:Storage = Storage(path.join(Context.plugin_dir, DATA_DIR))
+        self._cols:dict = {}
+        self._cols_for:list|None = None
+        self._indexed:bool = False
+        self._totalled:bool = False
+        self._located:bool = False
 
         self._load()
         self._initialized = True
@@ -76,13 +93,17 @@ class Router():
 
     def set_ship(self, ship_id:str, range:float, name:str, type:str) -> None:
         """ Set the current ship details"""
+        range = round(float(range) * 0.95, 2)
+        supercharge_mult:int = 6 if type in ('explorer_nx') else 4
+        if (range, supercharge_mult, name, type) == (self.range, self.supercharge_mult, self.ship.get('name'), self.ship.get('type')):
+            return # Loadouts are repeated for many reasons, nothing we care about has changed
         Debug.logger.debug(f"Setting current ship to {ship_id} {name} {type}")
 
-        self.range = round(float(range) * 0.95, 2)
-        self.supercharge_mult = 6 if type in ('explorer_nx') else 4
+        self.range = range
+        self.supercharge_mult = supercharge_mult
 
         self.ship['name'] = name
-        self.ship['range'] = round(float(range) * 0.95, 2)
+        self.ship['range'] = range
         self.ship['type'] = type
 
         Context.ui.set_range(self.range, self.supercharge_mult)
@@ -103,15 +124,80 @@ class Router():
 
     def _syscol(self, which:str = '') -> int:
         """ Figure out which column has a chosen key, by default the system name """
-        if which == '':
-            for h in ['System Name', 'system']:
-                if h in self.headers:
-                    which = h
-                    break
-        if which == '' or which not in self.headers:
+        if self._cols_for is not self.headers: # Headers have been replaced
+            self._cols = {h: i for i, h in enumerate(self.headers)}
+            self._cols[''] = self._cols.get('System Name', self._cols.get('system', 0))
+            self._cols_for = self.headers
+
+        return self._cols.get(which, 0)
+
+
+    def reindex(self) -> None:
+        """ Mark the waypoint index and totals stale, must be called whenever the route is replaced """
+        self.index.clear()
+        self._indexed = False
+        self.totals.clear()
+        self._totalled = False
+        self.geometry.clear()
+        self._located = False
+
+
+    def _waypoints(self) -> WaypointIndex:
+        """ Return the waypoint index, building it on first use so loading a route stays cheap """
+        if not self._indexed:
+            c:int = self._syscol()
+            self.index.build(self.route.column(c) if len(self.route) else [])
+            self._indexed = True
+            Debug.logger.debug(f"Indexed {len(self.route)} waypoints, {len(self.index)} unique systems")
+        return self.index
+
+
+    def _totals(self) -> RouteTotals:
+        """ Return the route totals, building them on first use """
+        if not self._totalled:
+            self.totals.build(self.headers, self.route)
+            self._totalled = True
+        return self.totals
+
+
+    def _geometry(self) -> RouteGeometry|None:
+        """ Return the route's coordinate index, building it on first use, or None if the route has no coordinates """
+        if not all(h in self.headers for h in COORDINATES):
+            return None
+        if not self._located:
+            self.geometry.build(*(self.route.raw(self._syscol(h)) for h in COORDINATES))
+            self._located = True
+            Debug.logger.debug(f"Located {len(self.geometry)} waypoints")
+        return self.geometry
+
+
+    def _resync(self) -> int|None:
+        """ Find the waypoint to pick up the route from when we're in a system that isn't on it """
+        geometry:RouteGeometry|None = self._geometry()
+        if self.position is None or geometry is None:
+            return None
+        return geometry.nearest(self.position)
+
+
+    def remaining(self, header:str = 'Jumps') -> int|float:
+        """ Total of a column still to travel from where we are, e.g. jumps or fuel """
+        if len(self.route) == 0 or self.next_stop == lbls['route_complete']:
+            return 0
+        return self._totals().remaining(header, self.offset)
+
+
+    def elapsed(self, header:str = 'Jumps') -> int|float:
+        """ Total of a column travelled so far on the route """
+        if len(self.route) == 0:
             return 0
+        if self.next_stop == lbls['route_complete']:
+            return self._totals().total(header)
+        return self._totals().elapsed(header, self.offset)
 
-        return self.headers.index(which)
+
+    @property
+    def jumps_left(self) -> int:
+        return self.remaining('Jumps')
 
 
     def _store_history(self) -> None:
@@ -121,6 +207,7 @@ class Router():
         if self.dest != '' and self.dest not in self.history:
             self.history.insert(0, self.dest)
         self.history = list(dict.fromkeys(self.history))[:10] # Keep only last 10 unique entries
+        Context.systems.add_many(self.history)
 
         self.ship['range'] = self.range
         self.ship['type'] = self.ship.get('type', '')
@@ -140,16 +227,18 @@ class Router():
         Debug.logger.debug(f"Updating route by {direction} {self.system}")
         c:int = self._syscol()
         if direction == 0: # Figure out if we're on the route
-            for i, r in enumerate(self.route):
-                if r[c] == self.system:
-                    Debug.logger.debug(f"Found system {self.offset} {direction}")
-                    self.offset = i
-                    break
-
-            # We aren't on the route so just return
-            if self.route[self.offset][c] != self.system:
+            found:int|None = self._waypoints().find(self.system, self.offset)
+            if found is None: # Not a route system, see if we're close to the route
+                found = self._resync()
+                if found is not None:
+                    Debug.logger.debug(f"Resyncing to waypoint {found} from {self.system} {self.position}")
+
+            # We aren't on or near the route so just return
+            if found is None:
                 Debug.logger.debug(f"We aren't on the route")
                 return
+            Debug.logger.debug(f"Found system {found} {direction}")
+            self.offset = found
             direction = 1  # Default to moving forwards
             Debug.logger.debug(f"New offset {self.offset} {direction} {self.route[self.offset][c]}")
 
@@ -159,122 +248,76 @@ class Router():
                 self.next_stop = lbls['route_complete']
                 self.jumps = 0
                 self._store_history()
-            Context.ui.show_frame('Route')
+            Context.ui.refresh('Route')
             return
 
         Debug.logger.debug(f"Stepping to {self.offset + direction} {self.route[self.offset + direction][c]}")
         self.offset += direction
         self.next_stop = self.route[self.offset][c]
         self.jumps = self.route[self.offset][self._syscol('Jumps')] if 'Jumps' in self.headers else 0
-        Context.ui.show_frame('Route')
+        self.save()
+        Context.ui.refresh('Route')
 
 
-    def plot_route(self, source:str, dest:str, efficiency:int, range:float, supercharge_mult:int = 4) -> bool:
-        """ Plot a route by querying Spansh"""
+    def plot_route(self, source:str, dest:str, efficiency:int, range:float, supercharge_mult:int = 4, listener = None) -> PlotJob:
+        """ Start a background job to plot a route by querying Spansh, listener is called with its progress """
         Debug.logger.debug(f"Plotting route")
+        self.cancel_plot()
+        self.plot_job = PlotJob(source, dest, efficiency, range, supercharge_mult, self.cache, listener)
+        self.plot_job.start()
+        return self.plot_job
+
+
+    def import_csv(self, filename:Path|str, listener = None) -> 'CSVImport':
+        """ Start a background import of a csv route, listener is called with its progress """
+        Debug.logger.debug(f"Importing {filename}")
+        from .csv import CSVImport
+        self.cancel_plot()
+        self.plot_job = CSVImport(filename, listener)
+        self.plot_job.start()
+        return self.plot_job
+
+
+    def cancel_plot(self) -> None:
+        """ Abort any plot that is still in progress """
+        if self.plot_job is not None and self.plot_job.is_alive():
+            self.plot_job.cancel()
+        self.plot_job = None
+
+
+    def set_route(self, route:Ingested, source:str, dest:str, efficiency:int, range:float, supercharge_mult:int = 4) -> None:
+        """ Install a freshly plotted or imported route, called on the Tk thread when a job completes """
+        self.plot_job = None
+        self.clear_route()
+        self.headers = route.headers
+        self.route = route.table
+        self.index = route.index
+        self._indexed = True
+        Context.systems.add_many(self.route.column(self._syscol()))
+        self.src = source
+        self.dest = dest
+        self.supercharge_mult = supercharge_mult
+        self.efficiency = efficiency
+        self.range = range
+        self.offset = 1 if self.route[0][self._syscol()] == self.system else 0
+        self.next_stop = self.route[self.offset][self._syscol()]
+        self.jumps = self.route[self.offset][self._syscol('Jumps')] if 'Jumps' in self.headers else 0
+        self.save_route()
 
-        try:
-            results:Response = requests.post(SPANSH_ROUTE + "?",
-                params={"efficiency": efficiency, "range": range, "from": source, "to": dest, 'supercharge_multiplier': supercharge_mult},
-                headers={'User-Agent': Context.plugin_useragent})
-
-            if results.status_code != 202:
-                self.plot_error(results)
-                return False
-
-            tries = 0
-            while tries < 20:
-                Debug.logger.debug(f"Checking for route results, try {tries + 1}")
-                response:dict = json.loads(results.content)
-                job:str = response["job"]
-
-                results_url:str = f"{SPANSH_RESULTS}/{job}"
-                route_response:Response = requests.get(results_url, timeout=5)
-                if route_response.status_code != 202:
-                    break
-                tries += 1
-                sleep(1)
-
-            if not route_response or route_response.status_code != 200:
-                self.plot_error(route_response)
-                return False
-
-            route:dict = json.loads(route_response.content)["result"]["system_jumps"]
-
-            cols:list = []
-            hdrs:list = []
-            for h in HEADERS:
-                if HEADER_MAP.get(h, '') in route[0].keys():
-                    hdrs.append(h)
-                    cols.append(HEADER_MAP.get(h, ''))
-
-            Debug.logger.debug(f"Cols: {cols} hdrs: {hdrs}")
-            rte:list = []
-            for waypoint in route:
-                r:list = []
-                for c in cols:
-                    r.append(waypoint[c] if not re.match(r"^\d+\.(\d+)?$", str(waypoint[c])) else round(float(waypoint[c]), 2))
-                rte.append(r)
-
-            self.clear_route()
-            self.headers = hdrs
-            self.route = rte
-            self.src = source
-            self.dest = dest
-            self.supercharge_mult = supercharge_mult
-            self.efficiency = efficiency
-            self.range = range
-            self.offset = 1 if self.route[0][self._syscol()] == self.system else 0
-            self.jumps_left = sum([j[cols.index('jumps')] for j in self.route]) if 'Jumps' in hdrs else 0
-            self.next_stop = self.route[self.offset][self._syscol()]
-            self.jumps = self.route[self.offset][cols.index('jumps')] if 'Jumps' in hdrs else 0
-            self.save()
-            return True
 
-        except Exception as e:
-            Debug.logger.error("Failed to plot route, exception info:", exc_info=e)
-            Context.ui.enable_plot_gui(True) # Return to the plot gui
-            Context.ui.show_error(lbls["plot_error"])
-        Debug.logger.debug(f"Done")
-        return False
-
-
-    def plot_error(self, response:Response) -> None:
-        """ Parse the response from Spansh on a failed route query """
-
-        err:str = ""
-        if response and response.status_code == 400 and "error" in json.loads(response.content):
-            err = json.loads(response.content)["error"]
-        elif response:
-            err = lbls["plot_error"]
-        else:
-            err = lbls["no_response"]
-
-        Context.ui.enable_plot_gui(True)
-        Context.ui.show_error(err)
-        return
+    def load_route(self, route:Ingested) -> None:
+        """ Install an imported route, which runs from its first to its last system """
+        c:int = route.headers.index('System Name')
+        self.set_route(route, route.table[0][c], route.table[-1][c], self.efficiency, self.range, self.supercharge_mult)
 
 
     def plot_edts(self, filename: Path | str) -> None:
         try:
             with open(filename, 'r') as txtfile:
-                route_txt:list = txtfile.readlines()
-                self.clear_route()
-                for row in route_txt:
-                    if row not in (None, "", []):
-                        if row.lstrip().startswith('==='):
-                            jumps = int(re.findall(r"\d+ jump", row)[0].rstrip(' jumps'))
-                            self.jumps_left += jumps
-
-                            system:str = row[row.find('>') + 1:]
-                            if ',' in system:
-                                systems:list = system.split(',')
-                                for system in systems:
-                                    self.route.append([system.strip(), jumps])
-                                    jumps = 1
-                                    self.jumps_left += jumps
-                            else:
-                                self.route.append([system.strip(), jumps])
+                route:Ingested|None = ingest(*edts_reader(txtfile))
+            if route is None:
+                raise ValueError(f"No route found in {filename}")
+            self.load_route(route)
         except Exception as e:
             Debug.logger.error("Failed to parse TXT route file, exception info:", exc_info=e)
             Context.ui.enable_plot_gui(True)
@@ -285,31 +328,35 @@ class Router():
         """ Clear the current route"""
         self.offset = 0
         self.headers = []
-        self.route = []
+        self.route = RouteTable()
+        self.reindex()
         self.next_stop:str = ""
-        self.jumps_left = 0
-        self.save()
+        self.save_route()
 
 
     @catch_exceptions
     def _load(self) -> None:
         ''' Load state from file '''
-        file:str = path.join(Context.plugin_dir, DATA_DIR, 'route.json')
-        if path.exists(file):
-            with open(file) as json_file:
-                self._from_dict(json.load(json_file))
+        self._from_dict(self.storage.load())
+        if self.storage.migrate:
+            self.save_route()
 
 
     @catch_exceptions
     def save(self) -> None:
-        ''' Save state to file '''
+        ''' Save our state, the write is deferred and coalesced with any other saves '''
+        self.storage.save_state(self._as_dict())
+
+
+    def save_route(self) -> None:
+        ''' Save the route table along with our state, call whenever the route is replaced '''
+        self.storage.save_route(self.headers, self.route)
+        self.save()
 
-        ind:int = 4
-        makedirs(path.join(Context.plugin_dir, DATA_DIR), exist_ok=True)
-        file:str = path.join(Context.plugin_dir, DATA_DIR, 'route.json')
 
-        with open(file, 'w') as outfile:
-            json.dump(self._as_dict(), outfile, indent=ind)
+    def flush(self) -> None:
+        ''' Write any pending saves to disk now '''
+        self.storage.flush()
 
 
     def _as_dict(self) -> dict:
@@ -322,12 +369,9 @@ class Router():
             'efficiency': self.efficiency,
             'supercharge_mult': self.supercharge_mult,
             'offset': self.offset,
-            'jumps_left': self.jumps_left,
             'next_stop': self.next_stop,
-            'headers': self.headers,
             'shipid': self.ship_id,
             'ship': self.ship,
-            'route': self.route,
             'ships': self.ships,
             'history': self.history
             }
@@ -342,10 +386,11 @@ class Router():
         self.efficiency = dict.get('efficiency', 60)
         self.supercharge_mult = dict.get('supercharge_mult', 4)
         self.offset = dict.get('offset', 0)
-        self.jumps_left = dict.get('jumps_left', 0)
         self.next_stop = dict.get('next_stop', "")
         self.headers = dict.get('headers', [])
-        self.route = dict.get('route', [])
+        route = dict.get('route', [])
+        self.route = route if isinstance(route, RouteTable) else RouteTable(route)
+        self.reindex()
         self.ship_id = dict.get('shipid', "")
         self.ship = dict.get('ship', {})
         self.ships = dict.get('ships', {})
@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+from os import path
+
+from utils.Debug import Debug, catch_exceptions
+
+from . import routefile
+from .constants import SAVE_DELAY, ROUTE_CODEC
+from .route import RouteTable
+
+
+class Storage:
+    """
+    Persist router state to DATA_DIR.
+    The small, frequently changing state (offset, system, ships, history) is kept apart from the
+    route table which only changes when a route is plotted, imported or cleared. Saves are coalesced
+    on a short timer and every write goes to a temporary file that is renamed into place, so a crash
+    can never leave a half written file behind.
+    """
+    def __init__(self, directory:str, delay:float = SAVE_DELAY) -> None:
+        self.directory:str = directory
+        self.state_file:str = path.join(directory, 'route.json')
+        self.route_file:str = path.join(directory, 'route.bin')
+        self.json_route_file:str = path.join(directory, 'route_data.json')
+        self.delay:float = delay
+        self.bytes_written:int = 0
+        self.migrate:bool = False   # Set when we loaded an old format file that should be rewritten
+
+        self._lock:threading.Lock = threading.Lock()
+        self._io_lock:threading.Lock = threading.Lock()
+        self._timer:threading.Timer|None = None
+        self._state:bytes|None = None
+        self._route:tuple|None = None
+
+
+    def load(self) -> dict:
+        """
+        Load the state and route, returning them merged into a single dictionary.
+        Only the route file's header is read here, the table's columns are decoded on first use.
+        """
+        data:dict = self._read(self.state_file)
+        if 'route' in data: # Older single file format, the route will be split out on the next save
+            Debug.logger.info(f"Migrating {self.state_file} to separate state and route files")
+            self.migrate = True
+            return data
+
+        if path.exists(self.route_file):
+            try:
+                data['headers'], data['route'] = routefile.read(self.route_file)
+                return data
+            except (OSError, ValueError, KeyError) as e:
+                Debug.logger.error(f"Unable to read {self.route_file}: {e}")
+
+        if path.exists(self.json_route_file): # Json route file, rewrite it in the binary format
+            Debug.logger.info(f"Migrating {self.json_route_file} to {path.basename(self.route_file)}")
+            data.update(self._read(self.json_route_file))
+            self.migrate = True
+        return data
+
+
+    def save_state(self, state:dict) -> None:
+        """ Queue a state save, rapid saves are coalesced into one write """
+        with self._lock:
+            self._state = json.dumps(state).encode('utf-8')
+            self._schedule()
+
+
+    def save_route(self, headers:list, route:RouteTable) -> None:
+        """ Queue a save of the route table, route must not be modified once passed in """
+        with self._lock:
+            self._route = (headers, route)
+            self._schedule()
+
+
+    @catch_exceptions
+    def flush(self) -> None:
+        """ Write anything pending immediately """
+        with self._io_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                state:bytes|None = self._state
+                route:tuple|None = self._route
+                self._state = None
+                self._route = None
+
+            os.makedirs(self.directory, exist_ok=True)
+            if route is not None:
+                headers, table = route
+                self._write(self.route_file, routefile.encode(headers, table, ROUTE_CODEC))
+                if path.exists(self.json_route_file):
+                    os.remove(self.json_route_file)
+            if state is not None:
+                self._write(self.state_file, state)
+
+
+    def _schedule(self) -> None:
+        """ Start the save timer if it isn't already running, must be called holding the lock """
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+    def _write(self, file:str, data:bytes) -> None:
+        tmp:str = file + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, file)
+        self.bytes_written += len(data)
+        Debug.logger.debug(f"Saved {len(data)} bytes to {path.basename(file)}")
+
+
+    def _read(self, file:str) -> dict:
+        if not path.exists(file):
+            return {}
+        try:
+            with open(file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            Debug.logger.error(f"Unable to read {file}: {e}")
+            return {}
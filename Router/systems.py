@@ -0,0 +1,211 @@
+import gzip
+import json
+import os
+import threading
+from bisect import bisect_left
+from os import path
+
+from utils.Debug import Debug, catch_exceptions
+
+from .constants import DATA_DIR, SYSTEMS_FILE, SYSTEMS_INSERT_MAX, AC_MAX_RESULTS
+from .context import Context
+
+
+class SystemIndex:
+    """
+    Local index of system names for instant autocomplete.
+    Names are held sorted by their lower case form so a prefix search is two bisects.
+    A name or two found since the last search are inserted in place, larger batches are merged
+    on a worker thread and swapped in when done so a search never waits on a full sort.
+    It learns from routes, history and the journal, can import a bulk list of names, and
+    is saved to DATA_DIR as a plain list of names, one per line.
+    """
+    # Singleton pattern
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+    def __init__(self) -> None:
+        # Only initialize if it's the first time
+        if hasattr(self, '_initialized'): return
+
+        self.file:str = path.join(Context.plugin_dir, DATA_DIR, SYSTEMS_FILE)
+        self._keys:list = []        # Lower case names, sorted
+        self._names:list = []       # Names in the same order as _keys
+        self._pending:dict = {}     # Lower case -> name, added but not yet merged
+        self._merger:threading.Thread|None = None
+        self._loaded:bool = False
+        self._dirty:bool = False
+        self._lock:threading.Lock = threading.Lock()
+
+        self._initialized = True
+
+
+    def add(self, name:str) -> None:
+        """ Add a single system name """
+        if not name: return
+        key:str = name.lower()
+        with self._lock:
+            if key in self._pending or self._contains(key):
+                return
+            self._pending[key] = name
+
+
+    def add_many(self, names) -> None:
+        """ Add an iterable of system names """
+        with self._lock:
+            for name in names:
+                if name:
+                    self._pending.setdefault(name.lower(), name)
+
+
+    def search(self, prefix:str, limit:int = AC_MAX_RESULTS) -> list:
+        """ Return up to limit names starting with prefix, case insensitively """
+        key:str = prefix.strip().lower()
+        if key == '':
+            return []
+        with self._lock:
+            self._merge()
+            i:int = bisect_left(self._keys, key)
+            results:list = []
+            while i < len(self._keys) and len(results) < limit and self._keys[i].startswith(key):
+                results.append(self._names[i])
+                i += 1
+            return results
+
+
+    @catch_exceptions
+    def import_file(self, filename:str) -> int:
+        """
+        Bulk import names from a text file with one name per line, or a json list of names
+        or of objects with a 'name', either optionally gzipped. Returns the number of names read.
+        """
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(filename, 'rt', encoding='utf-8') as f:
+            first:str = f.read(1)
+            f.seek(0)
+            if first == '[':
+                names:list = [n['name'] if isinstance(n, dict) else n for n in json.load(f)]
+            else:
+                names = [line.strip() for line in f]
+        self.add_many(names)
+        Debug.logger.info(f"Imported {len(names)} system names from {filename}")
+        return len(names)
+
+
+    @catch_exceptions
+    def save(self) -> None:
+        """ Write the index to disk if it has changed """
+        while self._merger is not None: # Let a merge in progress finish, what's left is merged here
+            merger:threading.Thread|None = self._merger
+            if merger is not None:
+                merger.join()
+        with self._lock:
+            self._load()
+            if self._merger is None:
+                merged:tuple|None = self._merged(self._keys, self._names, self._pending)
+                self._pending = {}
+                if merged is not None:
+                    self._keys, self._names = merged
+                    self._dirty = True
+            if not self._dirty:
+                return
+            os.makedirs(path.dirname(self.file), exist_ok=True)
+            with open(self.file + '.tmp', 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self._names))
+            os.replace(self.file + '.tmp', self.file)
+            self._dirty = False
+            Debug.logger.debug(f"Saved {len(self._names)} system names")
+
+
+    def _contains(self, key:str) -> bool:
+        self._load()
+        i:int = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+
+    def _merge(self) -> None:
+        """ Fold pending additions into the sorted lists, must be called holding the lock """
+        self._load()
+        if self._pending == {} or self._merger is not None:
+            return
+        if len(self._pending) <= SYSTEMS_INSERT_MAX:
+            self._insert(self._pending)
+            self._pending = {}
+            return
+        self._merger = threading.Thread(target=self._merge_worker, name="NeutronDancer-systems", daemon=True)
+        self._merger.start()
+
+
+    def _insert(self, pending:dict) -> None:
+        """ Insert a few names into the sorted lists in place, must be called holding the lock """
+        for key, name in pending.items():
+            i:int = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                continue
+            self._keys.insert(i, key)
+            self._names.insert(i, name)
+            self._dirty = True
+
+
+    @catch_exceptions
+    def _merge_worker(self) -> None:
+        """
+        Merge pending additions off the Tk thread. The lists aren't changed in place while we
+        run, so they're read without the lock and the merged ones swapped in once built.
+        """
+        try:
+            while True:
+                with self._lock:
+                    pending:dict = self._pending
+                    if len(pending) <= SYSTEMS_INSERT_MAX:
+                        self._insert(pending)
+                        self._pending = {}
+                        self._merger = None
+                        return
+                    self._pending = {}
+                    keys, names = self._keys, self._names
+                merged:tuple|None = self._merged(keys, names, pending)
+                if merged is None:
+                    continue
+                with self._lock:
+                    self._keys, self._names = merged
+                    self._dirty = True
+        finally:
+            with self._lock:
+                if self._merger is threading.current_thread():
+                    self._merger = None
+
+
+    @staticmethod
+    def _merged(keys:list, names:list, pending:dict) -> tuple|None:
+        """ Return new sorted lists with the pending names added, or None if they were all there already """
+        merged:dict = dict(zip(keys, names))
+        before:int = len(merged)
+        for key, name in pending.items():
+            merged.setdefault(key, name)
+        if len(merged) == before:
+            return None
+        keys = sorted(merged)
+        return keys, [merged[k] for k in keys]
+
+
+    def _load(self) -> None:
+        """ Read the saved index the first time it's needed """
+        if self._loaded:
+            return
+        self._loaded = True
+        if not path.exists(self.file):
+            return
+        try:
+            with open(self.file, encoding='utf-8') as f:
+                names:dict = {n.lower(): n for n in f.read().splitlines() if n}
+            self._keys = sorted(names)
+            self._names = [names[k] for k in self._keys]
+            Debug.logger.debug(f"Loaded {len(self._names)} system names")
+        except OSError as e:
+            Debug.logger.error(f"Unable to read {self.file}: {e}")
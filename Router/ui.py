@@ -1,11 +1,10 @@
-import subprocess
-import sys
+import os
 import tkinter as tk
 from tkinter import ttk
-import tkinter.messagebox as confirmDialog
 from functools import partial
 import re
-import webbrowser
+import threading
+from typing import TYPE_CHECKING
 
 from config import config # type: ignore
 
@@ -13,9 +12,16 @@ from utils.Tooltip import ToolTip
 from utils.Autocompleter import Autocompleter
 from utils.Placeholder import Placeholder
 from utils.Debug import Debug, catch_exceptions
-from .constants import lbls, btns, tts, errs, GIT_LATEST
+from utils.Clipboard import Clipboard
+from utils.Dispatcher import Dispatcher
+from .constants import lbls, btns, tts, errs, GIT_LATEST, COORDINATES
 
 from .context import Context
+from .plotter import PlotJob
+
+# Dialogs, the browser and the csv machinery are imported when they're first used
+if TYPE_CHECKING:
+    from .csv import CSVImport
 
 class UI():
     """
@@ -40,6 +46,7 @@ class UI():
             return
 
         self.error_txt:tk.StringVar = tk.StringVar()
+        self.progress_txt:tk.StringVar = tk.StringVar()
         self.parent:tk.Widget|None = parent
         self.window_route:RouteWindow = RouteWindow(self.parent.winfo_toplevel())
         self.frame:tk.Frame = tk.Frame(parent, borderwidth=2)
@@ -47,15 +54,12 @@ class UI():
         self.title_fr = None
         self.route_fr = None
         self.plot_fr = None
+        self.current:str|None = None  # Which frame is displayed
         self.update:tk.Label|None = None
+        self._refresh:str|None = None  # Frame waiting to be shown once Tk is idle
 
         if Context.updater and Context.updater.update_available:
-            Debug.logger.debug(f"UI: Update available")
-            Context.updater.install_update = False # We aren't doing auto installs right now
-            text:str = lbls['update_available'].format(v=str(Context.updater.update_version).replace("-", ""))
-            self.update = tk.Label(self.frame, text=text, anchor=tk.NW, font=("Helvetica", 9, "normal"), cursor='hand2')
-            self.update.bind("<Button-1>", partial(self.cancel_update))
-            self.update.grid(row=0, column=0, columnspan=2)
+            self.show_update()
 
         self.error_lbl:tk.Label|ttk.Label = self._label(self.frame, textvariable=self.error_txt)
         self.error_lbl.grid(row=1, column=0, columnspan=2)
@@ -66,45 +70,75 @@ class UI():
         self._initialized = True
 
 
+    @catch_exceptions
+    def show_update(self) -> None:
+        """ Let them know an update is available, when we start or once the background check finds one """
+        if self.update is not None:
+            return
+        Debug.logger.debug(f"UI: Update available")
+        text:str = lbls['update_available'].format(v=str(Context.updater.update_version).replace("-", ""))
+        self.update = tk.Label(self.frame, text=text, anchor=tk.NW, font=("Helvetica", 9, "normal"), cursor='hand2')
+        self.update.bind("<Button-1>", partial(self.cancel_update))
+        self.update.grid(row=0, column=0, columnspan=2)
+
+
     @catch_exceptions
     def cancel_update(self, tkEvent = None) -> None:
         """ Cancel the update if they click """
         Debug.logger.debug(f"Cancelling update, destroying frame")
+        import webbrowser
         webbrowser.open(GIT_LATEST)
         Context.updater.install_update = False
         self.update.destroy()
 
 
     def show_frame(self, which:str = 'Default'):
-        """ Display the chosen frame, creating it if necessary """
-        Debug.logger.debug(f"Show_frame {which}")
+        """ Display the chosen frame, frames are created the first time they're needed then updated in place """
+        if which == 'Route' and Context.router.next_stop == lbls['route_complete']:
+            Debug.logger.debug("Route complete, clearing route")
+            Context.router.clear_route()
+            which = 'Default'
+
         match which:
             case 'Route':
                 if self.route_fr == None:
                     self.route_fr = self._create_route_fr()
                 self._update_waypoint()
-                self.route_fr.grid()
-                if self.plot_fr != None: self.plot_fr.grid_remove()
-                self.plot_fr = None
-                if self.title_fr != None: self.title_fr.grid_remove()
-                self.title_fr = None
+                frame:tk.Frame = self.route_fr
             case 'Plot':
-                if self.route_fr != None: self.route_fr.grid_remove()
-                self.route_fr = None
                 if self.plot_fr == None:
                     self.plot_fr = self._create_plot_fr()
-                self.plot_fr.grid()
+                self._update_plot_fr()
                 self.enable_plot_gui(True)
-                if self.title_fr != None: self.title_fr.grid_remove()
-                self.title_fr = None
+                frame = self.plot_fr
             case _:
-                if self.route_fr != None: self.route_fr.grid_remove()
-                self.route_fr = None
-                if self.plot_fr != None: self.plot_fr.grid_remove()
-                self.plot_fr = None
+                which = 'Default'
                 if self.title_fr == None:
                     self.title_fr = self._create_title_fr()
-                self.title_fr.grid()
+                frame = self.title_fr
+
+        if which == self.current:
+            return
+        Debug.logger.debug(f"Show_frame {which}")
+        for fr in (self.route_fr, self.plot_fr, self.title_fr):
+            if fr != None and fr is not frame:
+                fr.grid_remove()
+        frame.grid(row=2, column=0)
+        self.current = which
+
+
+    def refresh(self, which:str = 'Route') -> None:
+        """ Show a frame once Tk is idle, any further requests before then are coalesced into one """
+        pending:bool = self._refresh is not None
+        self._refresh = which
+        if not pending:
+            self.parent.after_idle(self._refreshed)
+
+
+    @catch_exceptions
+    def _refreshed(self) -> None:
+        which, self._refresh = self._refresh, None
+        self.show_frame(which)
 
 
     def _create_title_fr(self) -> tk.Frame:
@@ -130,34 +164,20 @@ class UI():
         row:int = 2
         col:int = 0
 
-        # Define the popup menu additions
-        srcmenu:dict = {}
-        destmenu:dict = {}
-        shipmenu:dict = {}
-        for sys in Context.router.history:
-            srcmenu[sys] = [self.menu_callback, 'src']
-            destmenu[sys] = [self.menu_callback, 'dest']
-
-        for id, ship in Context.router.ships.items():
-            shipmenu[ship.get('name')] = [self.menu_callback, 'ship']
-
-        self.source_ac = Autocompleter(plot_fr, lbls["source_system"], width=30, menu=srcmenu)
+        self.source_ac = Autocompleter(plot_fr, lbls["source_system"], width=30)
         ToolTip(self.source_ac, tts["source_system"])
-        if Context.router.src != '': self.set_source_ac(Context.router.src)
         self.source_ac.grid(row=row, column=col, columnspan=2)
         col += 2
 
-        self.range_entry:Placeholder = Placeholder(plot_fr, lbls['range'], width=10, menu=shipmenu,)
+        self.range_entry:Placeholder = Placeholder(plot_fr, lbls['range'], width=10)
         self.range_entry.grid(row=row, column=col)
         ToolTip(self.range_entry, tts["range"])
         # Check if we're having a valid range on the fly
         self.range_entry.var.trace_add('write', self.check_range)
-        if Context.router.range > 0: self.range_entry.set_text(str(Context.router.range), False)
 
         row += 1; col = 0
-        self.dest_ac = Autocompleter(plot_fr, lbls["dest_system"], width=30, menu=destmenu)
-        ToolTip(self.source_ac, tts["dest_system"])
-        if Context.router.dest != '': self.set_dest_ac(Context.router.dest)
+        self.dest_ac = Autocompleter(plot_fr, lbls["dest_system"], width=30)
+        ToolTip(self.dest_ac, tts["dest_system"])
         self.dest_ac.grid(row=row, column=col, columnspan=2)
         col += 2
 
@@ -166,11 +186,9 @@ class UI():
         if config.get_int('theme') == 2: self.efficiency_slider.configure(fg=config.get_str('dark_text'), border=0)
         ToolTip(self.efficiency_slider, tts["efficiency"])
         self.efficiency_slider.grid(row=row, column=col)
-        self.efficiency_slider.set(Context.router.efficiency)
 
         row += 1; col = 0
         self.multiplier = tk.IntVar() # Or StringVar() for string values
-        self.multiplier.set(Context.router.supercharge_mult)  # Set default value
 
         # Create radio buttons
         l1 = self._label(plot_fr, text=lbls["supercharge_label"])
@@ -189,11 +207,47 @@ class UI():
         self.plot_route_btn.grid(row=row, column=col, padx=5, sticky=tk.W)
         col += 1
 
-        self.cancel_plot = self._button(plot_fr, text=btns["cancel"], command=lambda: self.show_frame('None'))
+        self.cancel_plot = self._button(plot_fr, text=btns["cancel"], command=lambda: self.cancel_plot_route())
         self.cancel_plot.grid(row=row, column=col, padx=5, sticky=tk.W)
+        col += 1
+
+        self.import_btn = self._button(plot_fr, text=btns["import_file"], command=lambda: self.import_route())
+        self.import_btn.grid(row=row, column=col, padx=5, sticky=tk.W)
+        col += 1
+
+        self.import_systems_btn = self._button(plot_fr, text=btns["import_systems"], command=lambda: self.import_systems())
+        self.import_systems_btn.grid(row=row, column=col, padx=5, sticky=tk.W)
+
+        row += 1; col = 0
+        self.progress_lbl = self._label(plot_fr, textvariable=self.progress_txt)
+        self.progress_lbl.grid(row=row, column=col, columnspan=3, padx=5, sticky=tk.W)
         return plot_fr
 
 
+    def _update_plot_fr(self) -> None:
+        """ Fill the plot frame from the router's current state """
+        # The popup menu additions
+        srcmenu:dict = {}
+        destmenu:dict = {}
+        shipmenu:dict = {}
+        for sys in Context.router.history:
+            srcmenu[sys] = [self.menu_callback, 'src']
+            destmenu[sys] = [self.menu_callback, 'dest']
+
+        for id, ship in Context.router.ships.items():
+            shipmenu[ship.get('name')] = [self.menu_callback, 'ship']
+
+        self.source_ac.set_menu(srcmenu)
+        self.dest_ac.set_menu(destmenu)
+        self.range_entry.set_menu(shipmenu)
+
+        if Context.router.src != '': self.set_source_ac(Context.router.src)
+        if Context.router.dest != '': self.set_dest_ac(Context.router.dest)
+        if Context.router.range > 0: self.range_entry.set_text(str(Context.router.range), False)
+        self.efficiency_slider.set(Context.router.efficiency)
+        self.multiplier.set(Context.router.supercharge_mult)
+
+
     def _update_waypoint(self) -> None:
         if Context.router.route == []:
             return
@@ -203,11 +257,22 @@ class UI():
         if Context.router.jumps != 0:
             wp += f" ({Context.router.jumps} {lbls['jumps'] if Context.router.jumps != 1 else lbls['jump']})"
         self.waypoint_btn.configure(text=wp)
-        if Context.router.jumps_left > 0:
-            ToolTip(self.waypoint_btn, tts["jump"] + " " + str(Context.router.jumps_left))
+        self.waypoint_tt.set_text(self._waypoint_tip())
+        self.window_route.goto(Context.router.offset)
         self.ctc(Context.router.next_stop)
 
 
+    def _waypoint_tip(self) -> str:
+        """ Waypoint tooltip with what's left of the route from where we are """
+        tip:str = tts["jump"] + " " + str(Context.router.remaining('Jumps'))
+        if 'Distance Remaining' in Context.router.headers or 'Distance Jumped' in Context.router.headers:
+            header:str = 'Distance Remaining' if 'Distance Remaining' in Context.router.headers else 'Distance Jumped'
+            tip += "\n" + tts["distance_left"].format(d=Context.router.remaining(header))
+        if 'Fuel Used' in Context.router.headers:
+            tip += "\n" + tts["fuel_left"].format(f=Context.router.remaining('Fuel Used'))
+        return tip
+
+
     def _create_route_fr(self) -> tk.Frame:
         """ Create the route display frame """
         Debug.logger.debug(f"Creating route frame")
@@ -227,7 +292,7 @@ class UI():
         Debug.logger.debug(f"waypoint_prev_btn created {self.waypoint_prev_btn}")
         col += 1
         self.waypoint_btn = self._button(fr1, text=Context.router.next_stop, width=30, command=lambda: self.ctc(Context.router.next_stop))
-        ToolTip(self.waypoint_btn, tts["jump"] + " " + str(Context.router.jumps_left))
+        self.waypoint_tt:ToolTip = ToolTip(self.waypoint_btn, '')
         self.waypoint_btn.grid(row=row, column=col, padx=5, pady=5, sticky=tk.W)
         Debug.logger.debug(f"waypoint_btn created {self.waypoint_btn}")
         col += 1
@@ -305,6 +370,7 @@ class UI():
 
     def _clear_route(self) -> None:
         """ Display a confirmation dialog for clearing the current route """
+        import tkinter.messagebox as confirmDialog
         clear: bool = confirmDialog.askyesno(
             Context.plugin_name,
             lbls["clear_route_yesno"]
@@ -341,13 +407,125 @@ class UI():
 
         self.source_ac.hide_list()
         self.dest_ac.hide_list()
-        res:bool = Context.router.plot_route(src, dest, eff, range, supercharge_mult)
-        Debug.logger.debug(f"Route plotted {res}")
-        if res == True:
-            self.ctc(Context.router.next_stop)
-            self.show_frame('Route')
+        self.plot_params = (src, dest, eff, range, supercharge_mult)
+        Context.router.plot_route(src, dest, eff, range, supercharge_mult,
+                                  lambda *msg: Dispatcher().post(self._plot_message, *msg))
+        self.cancel_plot.config(state=tk.NORMAL)
+
+
+    @catch_exceptions
+    def _plot_message(self, job:PlotJob, kind:str, payload) -> None:
+        """ Handle a progress message from a background plot job, on the Tk thread """
+        if job is not Context.router.plot_job:
+            return # Superseded or cancelled
+        match kind:
+            case 'progress':
+                self.progress_txt.set(payload)
+            case 'done':
+                self.progress_txt.set('')
+                Context.router.set_route(payload, *self.plot_params)
+                Debug.logger.debug(f"Route plotted")
+                self.ctc(Context.router.next_stop)
+                self.show_frame('Route')
+            case 'error':
+                self.progress_txt.set('')
+                Context.router.plot_job = None
+                self.enable_plot_gui(True)
+                self.show_error(payload)
+            case _:
+                self.progress_txt.set('')
+
+
+    @catch_exceptions
+    def import_route(self) -> None:
+        """ Ask for a route file and import it, csv files are read in the background """
+        ftypes:list = [
+            ('All supported files', '*.csv *.txt'),
+            ('CSV files', '*.csv'),
+            ('Text files', '*.txt'),
+        ]
+        from tkinter import filedialog
+        filename:str = filedialog.askopenfilename(filetypes=ftypes, initialdir=os.path.expanduser('~'))
+        if len(filename) == 0:
+            Debug.logger.debug(f"No filename selected")
+            return
+
+        self.hide_error()
+        if filename.lower().endswith('.txt'):
+            Context.router.plot_edts(filename)
+            if Context.router.route != []:
+                self.show_frame('Route')
+            return
+
+        self.enable_plot_gui(False)
+        Context.router.import_csv(filename, lambda *msg: Dispatcher().post(self._import_message, *msg))
+        self.cancel_plot.config(state=tk.NORMAL)
+
+
+    def import_systems(self) -> None:
+        """ Ask for a dump of system names and add them to the local index, in the background """
+        ftypes:list = [
+            ('System name files', '*.txt *.json *.gz'),
+            ('All files', '*.*'),
+        ]
+        from tkinter import filedialog
+        filename:str = filedialog.askopenfilename(filetypes=ftypes, initialdir=os.path.expanduser('~'))
+        if len(filename) == 0:
+            Debug.logger.debug(f"No filename selected")
             return
-        self.enable_plot_gui(True)
+
+        self.hide_error()
+        self.progress_txt.set(lbls["systems_importing"])
+        self.import_systems_btn.config(state=tk.DISABLED)
+
+        def work() -> None:
+            count:int|None = Context.systems.import_file(filename)
+            if count is not None:
+                Context.systems.save()
+            Dispatcher().post(self._systems_imported, count)
+
+        threading.Thread(target=work, name="NeutronDancer-systems", daemon=True).start()
+
+
+    @catch_exceptions
+    def _systems_imported(self, count:int|None) -> None:
+        """ Report a system name import, on the Tk thread """
+        self.import_systems_btn.config(state=tk.NORMAL)
+        if count is None:
+            self.progress_txt.set('')
+            self.show_error(lbls["systems_import_error"])
+            return
+        self.progress_txt.set(lbls["systems_imported"].format(n=count))
+
+
+    @catch_exceptions
+    def _import_message(self, job:'CSVImport', kind:str, payload) -> None:
+        """ Handle a progress message from a background csv import, on the Tk thread """
+        if job is not Context.router.plot_job:
+            return # Superseded or cancelled
+        match kind:
+            case 'progress':
+                self.progress_txt.set(payload)
+            case 'done':
+                self.progress_txt.set('')
+                Context.router.load_route(payload)
+                self.ctc(Context.router.next_stop)
+                self.show_frame('Route')
+            case 'error':
+                self.progress_txt.set('')
+                Context.router.plot_job = None
+                self.enable_plot_gui(True)
+                self.show_error(payload)
+            case _:
+                self.progress_txt.set('')
+
+
+    @catch_exceptions
+    def cancel_plot_route(self) -> None:
+        """ Cancel any plot in progress and close the plot frame """
+        Context.router.cancel_plot()
+        self.progress_txt.set('')
+        self.show_frame('None')
 
 
     def show_error(self, error:str|None = None) -> None:
@@ -362,7 +540,7 @@ class UI():
 
 
     def enable_plot_gui(self, enable:bool) -> None:
-        for elem in [self.source_ac, self.dest_ac, self.efficiency_slider, self.range_entry, self.plot_route_btn, self.cancel_plot]:
+        for elem in [self.source_ac, self.dest_ac, self.efficiency_slider, self.range_entry, self.plot_route_btn, self.cancel_plot, self.import_btn]:
             elem.config(state=tk.NORMAL if enable == True else tk.DISABLED)
             elem.update_idletasks()
 
@@ -372,22 +550,10 @@ class UI():
         if self.parent == None:
             return
         if text == '': text = Context.router.next_stop
-
-        if Context.router.next_stop == lbls['route_complete']:
-            Debug.logger.debug("No next stop to copy, clearing route")
-            Context.router.clear_route()
-            self.show_frame('None')
-            return
-
-        if sys.platform == "linux" or sys.platform == "linux2":
-            command = subprocess.Popen(["echo", "-n", text], stdout=subprocess.PIPE)
-            subprocess.Popen(["xclip", "-selection", "c"], stdin=command.stdout)
-            self.parent.update()
+        if text == lbls['route_complete']:
             return
 
-        self.parent.clipboard_clear()
-        self.parent.clipboard_append(text)
-        self.parent.update()
+        Clipboard().copy(text)
 
 
     def _button(self, fr:tk.Frame, **kw) -> tk.Button|ttk.Button:
@@ -424,6 +590,9 @@ class UI():
 class RouteWindow:
     """
     Treeview display of the current route.
+    Only the rows that fit in the window are ever inserted into the tree, scrolling just
+    rewrites their values, so opening a route of any length is instant. The window is hidden
+    rather than destroyed when closed and reused the next time it's shown.
     """
     # Singleton pattern
     _instance = None
@@ -441,7 +610,15 @@ class RouteWindow:
         self.root:tk.Tk|tk.Toplevel = root
         self.window:tk.Toplevel|None = None
         self.frame:tk.Frame|None = None
+        self.tree:ttk.Treeview|None = None
+        self.sb:ttk.Scrollbar|None = None
         self.scale:float = 1.0
+        self.row_height:int = 20
+
+        self.route = None           # The route we're displaying, to spot when it's replaced
+        self.headers:list = []
+        self.top:int = 0            # Route offset of the first visible row
+        self.rows:int = 0           # Number of tree items, i.e. visible rows
 
         self._initialized = True
 
@@ -449,40 +626,139 @@ class RouteWindow:
     @catch_exceptions
     def show(self) -> None:
         """ Show our window """
+        if Context.router.headers == [] or Context.router.route == []:
+            return
+
+        if self.window is None or not self.window.winfo_exists():
+            self._create()
+
+        if self.route is not Context.router.route or self.headers != Context.router.headers:
+            self._load()
+
+        self.window.deiconify()
+        self.window.lift()
+        self.goto(Context.router.offset)
 
+
+    def hide(self) -> None:
         if self.window is not None and self.window.winfo_exists():
-            self.window.destroy()
+            self.window.withdraw()
 
-        if Context.router.headers == [] or Context.router.route == []:
-            return
 
+    def visible(self) -> bool:
+        return self.window is not None and self.window.winfo_exists() and self.window.state() != 'withdrawn'
+
+
+    def _create(self) -> None:
+        """ Create the window and its widgets, done once """
         self.scale = config.get_int('ui_scale') / 100.00
+        self.row_height = int(20 * self.scale)
         self.window = tk.Toplevel(self.root)
-        self.window.title()
-        #self.window.iconphoto(False, 32x32, 16x16)
+        self.window.title(Context.plugin_name)
         self.window.geometry(f"{int(600*self.scale)}x{int(300*self.scale)}")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
 
         self.frame = tk.Frame(self.window, borderwidth=2)
         self.frame.pack(fill=tk.BOTH, expand=True)
         style:ttk.Style = ttk.Style()
         style.configure("My.Treeview.Heading", font=("Helvetica", 9, "bold"), background='lightgrey')
+        style.configure("My.Treeview", rowheight=self.row_height)
+
+        self.tree = ttk.Treeview(self.frame, show="headings", style="My.Treeview", selectmode='none')
+        self.tree.tag_configure('current', background='lightblue')
+        self.sb = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.sb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.yview('scroll', -1 * (e.delta // 120 or (1 if e.delta > 0 else -1)) * 3, 'units'))
+        self.tree.bind("<Button-4>", lambda e: self.yview('scroll', -3, 'units'))
+        self.tree.bind("<Button-5>", lambda e: self.yview('scroll', 3, 'units'))
+        self.route = None
+
+
+    def _load(self) -> None:
+        """ Set up the columns for a new route """
+        self.route = Context.router.route
+        self.headers = list(Context.router.headers)
+        shown:list = [h for h in self.headers if h not in COORDINATES]
+        self.tree.configure(columns=self.headers, displaycolumns=shown)
+
+        widths:list = self._widths()
+        for i, hdr in enumerate(self.headers):
+            self.tree.heading(hdr, text=hdr, anchor=tk.W if i == 0 else tk.E)
+            self.tree.column(hdr, stretch=tk.NO, width=int(widths[i]*8*self.scale), anchor=tk.W if i == 0 else tk.E)
+
+        w:int = sum([int(widths[i]*8*self.scale) for i, h in enumerate(self.headers) if h in shown]) + 30
+        self.window.geometry(f"{int(w)}x{self.window.winfo_height() if self.window.winfo_ismapped() else int(300*self.scale)}")
+        self.top = 0
+        self._render()
+
+
+    def _widths(self) -> list:
+        """ Estimate column widths from a sample of rows: the start, the end and evenly spaced between """
+        route = self.route
+        n:int = len(route)
+        sample:set = set(range(min(n, 100))) | set(range(max(0, n - 100), n)) | set(range(0, n, max(1, n // 200)))
+        widths:list = [len(w)+1 for w in self.headers]
+        for i in sample:
+            widths = [max(widths[c], len(str(w))+1) for c, w in enumerate(route[i])]
+        return widths
+
+
+    def _resize(self, event=None) -> None:
+        """ Match the number of tree items to the number of rows that fit """
+        rows:int = max(1, (self.tree.winfo_height() - self.row_height) // self.row_height)
+        if rows != self.rows:
+            self.rows = rows
+            self._render()
+
+
+    def yview(self, *args) -> None:
+        """ Scrollbar and mouse wheel handler, moves the window over the route """
+        total:int = len(self.route) if self.route is not None else 0
+        match args:
+            case ('moveto', frac):
+                top:int = int(float(frac) * total)
+            case ('scroll', n, 'pages'):
+                top = self.top + int(n) * self.rows
+            case ('scroll', n, _):
+                top = self.top + int(n)
+            case _:
+                return
+        top = max(0, min(top, total - self.rows))
+        if top != self.top:
+            self.top = top
+            self._render()
 
-        tree:ttk.Treeview = ttk.Treeview(self.frame, columns=Context.router.headers, show="headings", style="My.Treeview")
-        sb:ttk.Scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=tree.yview)
-        sb.pack(side=tk.RIGHT, fill=tk.Y)
-        tree.configure(yscrollcommand=sb.set)
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        widths:list = [len(w)+1 for w in Context.router.headers]
-        for r in Context.router.route:
-            widths = [max(widths[i], len(str(w))+1) for i, w in enumerate(r)]
 
-        for i, hdr in enumerate(Context.router.headers):
-            tree.heading(hdr, text=hdr, anchor=tk.W if i == 0 else tk.E)
-            tree.column(hdr, stretch=tk.NO, width=int(widths[i]*8*self.scale), anchor=tk.W if i == 0 else tk.E)
+    def goto(self, offset:int) -> None:
+        """ Highlight a row, scrolling it into view if it isn't visible """
+        if not self.visible() or self.route is not Context.router.route:
+            return
+        if offset < self.top or offset >= self.top + self.rows:
+            self.top = max(0, min(offset - self.rows // 3, len(self.route) - self.rows))
+        self._render()
 
-        for row in Context.router.route:
-            tree.insert("", 'end', values=row)
 
-        w:int = sum([int(widths[i]*8*self.scale) for i in range(len(widths))]) + 30
-        self.window.geometry(f"{int(w)}x{int(300*self.scale)}")
+    def _render(self) -> None:
+        """ Write the visible slice of the route into the tree items """
+        if self.tree is None or self.route is None:
+            return
+        items:tuple = self.tree.get_children()
+        total:int = len(self.route)
+        count:int = min(self.rows, total)
+        if len(items) > count:
+            self.tree.delete(*items[count:])
+            items = items[:count]
+        for _ in range(count - len(items)):
+            self.tree.insert("", 'end')
+        items = self.tree.get_children()
+
+        offset:int = Context.router.offset if Context.router.route is self.route else -1
+        for i, iid in enumerate(items):
+            row:int = self.top + i
+            self.tree.item(iid, values=list(self.route[row]), tags=('current',) if row == offset else ())
+
+        if total > 0:
+            self.sb.set(self.top / total, min(1.0, (self.top + count) / total))
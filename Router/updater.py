@@ -1,17 +1,28 @@
+import hashlib
 import json
 import os
+import re
+import shutil
+import threading
 import requests
 import zipfile
-import webbrowser
+from pathlib import Path
 from semantic_version import Version # type: ignore
 
-from .constants import GIT_PROJECT, GIT_DOWNLOAD, GIT_CHANGELOG_LIST, GIT_CHANGELOG, GIT_VERSION
+from .constants import GIT_PROJECT, GIT_CHANGELOG_LIST, GIT_VERSION, DATA_DIR, HTTP_CACHE_FILE, UPDATE_FILE, UPDATE_DIR, UPDATE_CHUNK
 from utils.Debug import Debug, catch_exceptions
+from utils.Dispatcher import Dispatcher
+from .cache import MetadataCache
 from .context import Context
+from .network import Network
 
 class Updater():
     """
-    Handle checking for and installing updates
+    Handle checking for and installing updates.
+    The check runs on a background thread and the version file and release notes are kept in
+    a MetadataCache, so the next launch knows about an update straight away and revalidates
+    cheaply, if at all. A new version is downloaded (resuming a partial download), verified and unpacked
+    beside the plugin ahead of time, so installing at shutdown is only a directory swap.
     """
     # Singleton pattern
     _instance = None
@@ -29,86 +40,298 @@ class Updater():
         if plugin_dir != '': self.plugin_dir:str = plugin_dir
 
         self.update_available:bool = False
-        self.install_update:bool = False
+        self.install_update:bool = False   # Only ever set by them choosing to install, we don't auto install
         self.update_version:Version
-
+        self.changelogs:str = ""
         self.download_url:str = ""
+        self.download_size:int|None = None     # Size and sha256 of the download, if the release gives them
+        self.download_digest:str|None = None
         self.zip_downloaded:str = ""
 
+        self.stopping:threading.Event = threading.Event()
+        self._lock:threading.Lock = threading.Lock()
+
         # Make sure we're actually initialized
         if self.version != None and self.plugin_dir != '':
+            plugin:Path = Path(self.plugin_dir)
+            self.http:MetadataCache = MetadataCache(os.path.join(self.plugin_dir, DATA_DIR, HTTP_CACHE_FILE))
+            self.state_file:str = os.path.join(self.plugin_dir, DATA_DIR, UPDATE_FILE)
+            self.zip_dir:str = os.path.join(self.plugin_dir, DATA_DIR, UPDATE_DIR)
+            # Beside the plugin and hidden, EDMC doesn't load directories starting with a '.'
+            self.staged_dir:Path = plugin.with_name(f".{plugin.name}.staged")
+            self.old_dir:Path = plugin.with_name(f".{plugin.name}.old")
+            self.state:dict = self._load_state()
+            self._cached()
             self._initialized = True
 
+
+    def stop(self) -> None:
+        """ Abandon any check or download still in progress, it resumes next launch """
+        self.stopping.set()
+
+
+    @catch_exceptions
+    def run(self) -> None:
+        """ Check for, download and stage an update, called on a background thread """
+        shutil.rmtree(self.old_dir, ignore_errors=True) # Left by the last install
+        self.check_for_update()
+        if not self.update_available or self.stopping.is_set():
+            return
+        Dispatcher().post(self._notify)
+        if self.staged() or not self.get_changelogs():
+            return
+        if self.download_zip():
+            self.stage()
+
+
+    def _notify(self) -> None:
+        """ Tell the UI, on the Tk thread """
+        if Context.ui is not None:
+            Context.ui.show_update()
+
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+    def _save_state(self) -> None:
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(self.state_file + '.tmp', 'w') as f:
+            json.dump(self.state, f)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+
+    def _cached(self) -> None:
+        """ Pick up an update found by an earlier launch """
+        try:
+            latest:Version = Version.coerce(self.http.peek(GIT_VERSION) or '')
+        except ValueError:
+            return
+        if latest > self.version:
+            self.update_available = True
+            self.update_version = latest
+            release:dict|None = self.http.peek(GIT_CHANGELOG_LIST)
+            if release is not None and self._describes(release):
+                self._release(release)
+
+
     def download_zip(self) -> bool:
-        """ Download the zipfile of the latest version """
+        """ Download the zipfile of the latest version, resuming a partial download and verifying the result """
+        os.makedirs(self.zip_dir, exist_ok=True)
+        zip_file:str = os.path.join(self.zip_dir, f"{GIT_PROJECT}-{self.update_version}.zip")
+        release:dict = self.state.setdefault('release', {})
+        if os.path.exists(zip_file) and release.get('sha256') and self._digest(zip_file) == release['sha256']:
+            self.zip_downloaded = zip_file
+            return True
+
+        part:str = zip_file + '.part'
+        have:int = os.path.getsize(part) if os.path.exists(part) else 0
+        headers:dict = {'Accept-Encoding': 'identity'}
+        if have:
+            headers['Range'] = f"bytes={have}-"
+            if release.get('etag'): # Only resume if the file hasn't changed since
+                headers['If-Range'] = release['etag']
         try:
-            r:requests.Response = requests.get(self.download_url)
-            Debug.logger.debug(f"{r}")
+            r:requests.Response = Network().get(self.download_url, stream=True, timeout=(5, 30), headers=headers)
+            if r.status_code == 416: # Nothing left to send, or the part is junk, start again
+                os.remove(part)
+                return self.download_zip()
             r.raise_for_status()
-        except Exception:
-            Debug.logger.error(f"Failed to download {GIT_PROJECT} update (status code {r.status_code}).)")
+        except (requests.RequestException, OSError) as e:
+            Debug.logger.error(f"Failed to download {GIT_PROJECT} update", exc_info=e)
+            return False
+
+        digest = hashlib.sha256()
+        if r.status_code == 206:
+            Debug.logger.info(f"Resuming download of {GIT_PROJECT} at {have} bytes")
+            with open(part, 'rb') as f:
+                for chunk in iter(lambda: f.read(UPDATE_CHUNK), b''):
+                    digest.update(chunk)
+        else:
+            have = 0
+        total:int|None = self._length(r, have)
+        release['etag'] = r.headers.get('ETag', release.get('etag'))
+        self._save_state()
+
+        Debug.logger.info(f"Downloading {GIT_PROJECT} to " + zip_file)
+        try:
+            with open(part, 'ab' if have else 'wb') as f:
+                for chunk in r.iter_content(chunk_size=UPDATE_CHUNK):
+                    if self.stopping.is_set():
+                        Debug.logger.info(f"Download of {GIT_PROJECT} interrupted, it will resume next launch")
+                        return False
+                    f.write(chunk)
+                    digest.update(chunk)
+        except (requests.RequestException, OSError) as e:
+            Debug.logger.error(f"Download of {GIT_PROJECT} update failed, it will resume next launch: {e}")
+            return False
+
+        size:int = os.path.getsize(part)
+        expected:str|None = self.download_digest
+        if (total is not None and size != total) or (expected and digest.hexdigest() != expected) or not self._intact(part):
+            Debug.logger.error(f"Downloaded {GIT_PROJECT} update failed verification ({size} bytes, sha256 {digest.hexdigest()})")
+            os.remove(part)
             return False
 
-        zip_path:str = os.path.join(self.plugin_dir, "updates")
-        os.makedirs(zip_path, exist_ok=True)
-        zip_file:str = os.path.join(zip_path, f"{GIT_PROJECT}-{self.update_version}.zip")
-        with open(zip_file, 'wb') as f:
-            Debug.logger.info(f"Downloading {GIT_PROJECT} to " + zip_file)
-            #f.write(os.path.join(r.content))
-            for chunk in r.iter_content(chunk_size=32768):
-                f.write(chunk)
+        os.replace(part, zip_file)
+        release['sha256'] = digest.hexdigest()
+        self._save_state()
         self.zip_downloaded = zip_file
         return True
 
-    def install(self) -> None:
-        if not self.get_changelogs():
-            return
 
-        if not self.download_zip():
-            return
+    def _length(self, r:requests.Response, have:int) -> int|None:
+        """ Full size of the file from the response, if the server says """
+        if m := re.match(r'bytes \d+-\d+/(\d+)', r.headers.get('Content-Range', '')):
+            return int(m.group(1))
+        if r.headers.get('Content-Length', '').isdigit() and 'Content-Encoding' not in r.headers:
+            return have + int(r.headers['Content-Length'])
+        return self.download_size
+
+
+    def _digest(self, file:str) -> str:
+        digest = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPDATE_CHUNK), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+    def _intact(self, file:str) -> bool:
+        try:
+            with zipfile.ZipFile(file) as z:
+                return z.testzip() is None
+        except (zipfile.BadZipFile, OSError):
+            return False
+
+
+    def stage(self) -> bool:
+        """ Unpack the downloaded zip beside the plugin, ready to be swapped in """
+        staging:Path = self.staged_dir.with_name(self.staged_dir.name + '.tmp')
+        shutil.rmtree(staging, ignore_errors=True)
         try:
-            Debug.logger.debug(f"Extracting zipfile to {self.plugin_dir}")
-            with zipfile.ZipFile(self.zip_downloaded, 'r') as zip_ref:
-                zip_ref.extractall(self.plugin_dir)
-            #os.remove(self.zip_path)
+            with zipfile.ZipFile(self.zip_downloaded) as z:
+                names:list = [n for n in z.namelist() if not n.endswith('/')]
+                # Github zips hold everything in a single top level directory
+                top:str = names[0].split('/')[0] + '/' if names and '/' in names[0] else ''
+                if top == '' or any(not n.startswith(top) for n in names):
+                    top = ''
+                for name in names:
+                    target:Path = (staging / name[len(top):]).resolve()
+                    if not target.is_relative_to(staging.resolve()):
+                        raise ValueError(f"{name} would be extracted outside the plugin")
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with z.open(name) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, UPDATE_CHUNK)
+
+            if Version.coerce((staging / 'version').read_text()) != self.update_version:
+                raise ValueError(f"Update contains the wrong version")
+            with self._lock:
+                shutil.rmtree(self.staged_dir, ignore_errors=True)
+                os.replace(staging, self.staged_dir)
+                self.state['staged'] = str(self.update_version)
+                self._save_state()
+            Debug.logger.info(f"Staged {GIT_PROJECT} {self.update_version} in {self.staged_dir}")
+            return True
         except Exception as e:
-            Debug.logger.error("Failed to install update, exception info:", exc_info=e)
+            Debug.logger.error("Failed to stage update, exception info:", exc_info=e)
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+
+
+    def staged(self) -> bool:
+        """ Whether the update is unpacked and ready to install """
+        return self.state.get('staged') == str(self.update_version) and self.staged_dir.is_dir()
+
+
+    def install(self) -> None:
+        """ Swap the staged update in for the plugin, keeping our data, at shutdown """
+        self.stop()
+        with self._lock:
+            if not self.update_available or not self.staged():
+                Debug.logger.info(f"Update {GIT_PROJECT} not ready to install")
+                return
+
+            plugin:Path = Path(self.plugin_dir)
+            data:Path = plugin / DATA_DIR
+            shutil.rmtree(self.old_dir, ignore_errors=True)
+            shutil.rmtree(self.zip_dir, ignore_errors=True)
+            try:
+                if data.is_dir():
+                    os.replace(data, self.staged_dir / DATA_DIR)
+                os.replace(plugin, self.old_dir)
+            except OSError as e:
+                Debug.logger.error("Failed to install update, exception info:", exc_info=e)
+                if (self.staged_dir / DATA_DIR).is_dir() and not data.exists():
+                    os.replace(self.staged_dir / DATA_DIR, data)
+                return
+            try:
+                os.replace(self.staged_dir, plugin)
+            except OSError as e:
+                Debug.logger.error("Failed to install update, restoring the current version:", exc_info=e)
+                os.replace(self.old_dir, plugin)
+                os.replace(self.staged_dir / DATA_DIR, data)
+                return
+            Debug.logger.info(f"Installed {GIT_PROJECT} {self.update_version}")
+            shutil.rmtree(self.old_dir, ignore_errors=True)
+
 
     def get_changelogs(self) -> bool:
-        try:
-            Debug.logger.debug(f"Requesting {GIT_CHANGELOG_LIST}")
-            r:requests.Response = requests.get(GIT_CHANGELOG_LIST, timeout=2)
-            r.raise_for_status()
-        except requests.RequestException as e:
-            Debug.logger.error("Failed to get changelog, exception info:", exc_info=e)
+        Debug.logger.debug(f"Requesting {GIT_CHANGELOG_LIST}")
+        release:dict|None = self.http.get(GIT_CHANGELOG_LIST, timeout=(5, 10))
+        if release is not None and not self._describes(release): # Cached notes from before this version
+            release = self.http.get(GIT_CHANGELOG_LIST, min_age=0, timeout=(5, 10))
+        if release is None:
             self.install_update = False
             return False
 
-        Debug.logger.debug(f"{json.loads(r.content)}")
-        # Get the changelog and replace all breaklines with simple ones
-        changelogs:str = json.loads(r.content).get('body', '')
-        self.changelogs = "\n".join(changelogs.splitlines())
-        self.download_url = json.loads(r.content).get('zipball_url', '')
-        Debug.logger.debug(f"{changelogs}")
-
+        self._release(release)
+        cached:dict = self.state.get('release', {})
+        if cached.get('url') != self.download_url: # A different file, anything we had doesn't apply
+            self.state['release'] = {'url': self.download_url}
+            self._save_state()
         return True
 
 
+    def _describes(self, release:dict) -> bool:
+        """ Whether a release document is for the version we're updating to """
+        try:
+            return Version.coerce(release.get('tag_name', '').lstrip('v')) == self.update_version
+        except ValueError:
+            return False
+
+
+    def _release(self, release:dict) -> None:
+        """ Take the changelog and what to download from the release document """
+        # Get the changelog and replace all breaklines with simple ones
+        self.changelogs = "\n".join(release.get('body', '').splitlines())
+        # Prefer an uploaded zip, it comes with a size and checksum, to the generated zipball
+        asset:dict = next((a for a in release.get('assets', []) if a.get('name', '').endswith('.zip')), {})
+        self.download_url = asset.get('browser_download_url') or release.get('zipball_url', '')
+        self.download_size = asset.get('size')
+        digest:str = asset.get('digest') or ''
+        self.download_digest = digest.removeprefix('sha256:') if digest.startswith('sha256:') else None
+        Debug.logger.debug(f"{self.changelogs}")
+
+
     @catch_exceptions
     def check_for_update(self) -> None:
         try:
             Debug.logger.debug(f"Checking for update")
-            response:requests.Response = requests.get(GIT_VERSION, timeout=2)
-            if response.status_code != 200:
-                Debug.logger.error(f"Could not query latest {GIT_PROJECT} version (status code {response.status_code}): {response.text}")
+            text:str|None = self.http.get(GIT_VERSION, parse=lambda content: content.decode('utf-8').strip(), timeout=(5, 10))
+            if text is None:
                 return
-            Debug.logger.debug(f"response {Version.coerce(response.text)}")
-            if self.version == Version.coerce(response.text):
+            latest:Version = Version.coerce(text)
+            Debug.logger.debug(f"response {latest}")
+            self.update_available = latest > self.version
+            if not self.update_available:
                 return
             Debug.logger.debug('Update available')
-            self.update_available = True
-            self.install_update = True
-            self.update_version:Version = Version.coerce(response.text)
+            self.update_version:Version = latest
 
         except Exception as e:
             Debug.logger.error("Failed to check for updates, exception info:", exc_info=e)
@@ -0,0 +1,166 @@
+"""
+Generate synthetic routes, and journals that fly them, at any scale.
+
+    python -m benchmarks.generate --waypoints 1000000 --format csv --out big.csv
+    python -m benchmarks.generate --waypoints 5000 --format journal --offroute 0.05 --out Journal.synth.log
+
+Formats are Spansh neutron results (spansh), Spansh neutron, road to riches and fleet carrier
+csv exports (csv, r2r, fleet), EDTS text routes (edts) and journals (journal). Everything is
+written as it's generated so a million waypoints needs little memory, and a seed always
+produces the same route, so files made on different machines or days can be compared.
+"""
+import argparse
+import csv
+import json
+import random
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, TextIO
+
+FORMATS:tuple = ('spansh', 'csv', 'r2r', 'fleet', 'edts', 'journal')
+SUBTYPES:tuple = ('High metal content world', 'Water world', 'Earthlike body', 'Ammonia world', 'Metal rich body')
+
+
+def waypoints(count:int, seed:int = 1) -> Iterator[tuple]:
+    """
+    A route heading roughly along x with legs of 40 to 90 ly, as tuples of
+    (name, jumps, neutron, distance jumped, distance remaining, x, y, z)
+    """
+    rng:random.Random = random.Random(seed)
+    legs:array = array('d', (0.0 if i == 0 else round(rng.uniform(40, 90), 2) for i in range(count)))
+    left:float = sum(legs)
+    x = y = z = 0.0
+    for i, leg in enumerate(legs):
+        x += leg
+        y += rng.uniform(-5, 5)
+        z += rng.uniform(-5, 5)
+        left -= leg
+        yield (f"Synth {i}", 0 if i == 0 else rng.randint(1, 4), i % 3 != 0, leg, round(max(left, 0.0), 2),
+               round(x, 2), round(y, 2), round(z, 2))
+
+
+def journal(count:int, seed:int = 1, offroute:float = 0.0) -> Iterator[tuple]:
+    """
+    Fly a route of count waypoints, yielding (entry, system) in the order EDMC delivers them:
+    a Location, Loadout and StoredShips then an FSDJump and SupercruiseExit per waypoint, with
+    offroute of the jumps landing beside the route rather than on it.
+    """
+    rng:random.Random = random.Random(seed + 1)
+    clock:datetime = datetime(3311, 1, 1, tzinfo=timezone.utc)
+
+    def stamp(entry:dict) -> dict:
+        nonlocal clock
+        clock += timedelta(seconds=rng.randint(5, 60))
+        return {'timestamp': clock.strftime('%Y-%m-%dT%H:%M:%SZ'), **entry}
+
+    loadout:dict = {'event': 'Loadout', 'ShipID': 1, 'MaxJumpRange': 72.4, 'ShipName': 'Dancer', 'Ship': 'anaconda'}
+    for i, (name, jumps, neutron, leg, left, x, y, z) in enumerate(waypoints(count, seed)):
+        pos:list = [x, y, z]
+        if i == 0:
+            yield stamp({'event': 'Location', 'StarSystem': name, 'StarPos': pos}), name
+            yield stamp(loadout), name
+            yield stamp({'event': 'StoredShips', 'ShipsHere': [], 'ShipsRemote': [{'ShipID': 2, 'ShipType': 'explorer_nx'}]}), name
+            continue
+        if rng.random() < offroute: # Drop out of the jump beside the route
+            name = f"Stray {i}"
+            pos = [round(v + rng.uniform(-20, 20), 2) for v in pos]
+        yield stamp({'event': 'FSDJump', 'StarSystem': name, 'StarPos': pos, 'JumpDist': leg}), name
+        yield stamp({'event': 'SupercruiseExit', 'StarSystem': name}), name
+        if i % 50 == 0:
+            yield stamp(loadout), name
+
+
+def write_spansh(f:TextIO, count:int, seed:int = 1) -> None:
+    """ A Spansh neutron plotter result, as the results endpoint returns it """
+    names:list = []
+    f.write('{"status": "ok", "job": "synthetic", "result": {"system_jumps": [')
+    for i, (name, jumps, neutron, leg, left, x, y, z) in enumerate(waypoints(count, seed)):
+        if i == 0 or i == count - 1:
+            names.append(name)
+        f.write((',' if i else '') + json.dumps({'system': name, 'jumps': jumps, 'neutron_star': neutron, 'distance_jumped': leg,
+                                                 'distance_left': left, 'x': x, 'y': y, 'z': z, 'id64': seed * 10**9 + i}))
+    f.write(f'], "source_system": {json.dumps(names[0] if names else "")}, "destination_system": {json.dumps(names[-1] if names else "")}')
+    f.write(', "efficiency": 60, "range": 72.4}}')
+
+
+def write_csv(f:TextIO, count:int, seed:int = 1, kind:str = 'csv') -> None:
+    """ A Spansh csv export: neutron (csv), road to riches (r2r) or fleet carrier (fleet) """
+    rng:random.Random = random.Random(seed + 2)
+    writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    match kind:
+        case 'r2r':
+            writer.writerow(["System Name", "Body Name", "Body Subtype", "Is Terraformable", "Distance To Arrival",
+                             "Estimated Scan Value", "Estimated Mapping Value", "Jumps"])
+            for name, jumps, *_ in waypoints(count, seed):
+                for b in range(rng.randint(1, 5)): # A row per body to scan
+                    writer.writerow([name, f"{name} {chr(ord('A') + b)} {b + 1}", rng.choice(SUBTYPES),
+                                     'Yes' if rng.random() < 0.4 else 'No', rng.randint(10, 50000),
+                                     rng.randint(100000, 3000000), rng.randint(300000, 9000000), jumps if b == 0 else 0])
+        case 'fleet':
+            writer.writerow(["System Name", "Distance", "Distance Remaining", "Tritium in tank", "Tritium in market",
+                             "Fuel Used", "Icy Ring", "Pristine", "Restock Tritium"])
+            tank:int = 1000
+            for name, jumps, neutron, leg, left, *_ in waypoints(count, seed):
+                fuel:int = 0 if leg == 0 else int(5 + leg / 4)
+                restock:bool = tank - fuel < 200
+                tank = 1000 if restock else tank - fuel
+                writer.writerow([name, leg, left, tank, 0, fuel, 'Yes' if rng.random() < 0.1 else 'No',
+                                 'Yes' if rng.random() < 0.05 else 'No', 'Yes' if restock else 'No'])
+        case _:
+            writer.writerow(["System Name", "Distance", "Distance Remaining", "Neutron Star", "Jumps"])
+            for name, jumps, neutron, leg, left, *_ in waypoints(count, seed):
+                writer.writerow([name, leg, left, 'Yes' if neutron else 'No', jumps])
+
+
+def write_edts(f:TextIO, count:int, seed:int = 1) -> None:
+    """ An EDTS route, each '===' line carries the jumps to the first of the systems after it """
+    rng:random.Random = random.Random(seed + 3)
+    f.write("Route:\n")
+    previous:str = ''
+    line:list = []
+    jumps:int = 0
+    for name, j, *_ in waypoints(count, seed):
+        if previous == '':
+            previous = name
+            continue
+        if line == []:
+            jumps = j
+        line.append(name)
+        if rng.random() < 0.6: # Sometimes several systems share a line
+            f.write(f"  === {jumps} jumps: {previous} > {', '.join(line)}\n")
+            previous, line = line[-1], []
+    if line:
+        f.write(f"  === {jumps} jumps: {previous} > {', '.join(line)}\n")
+
+
+def write_journal(f:TextIO, count:int, seed:int = 1, offroute:float = 0.0) -> None:
+    """ A journal file flying a route of count waypoints """
+    for entry, _ in journal(count, seed, offroute):
+        f.write(json.dumps(entry) + "\n")
+
+
+def write(fmt:str, f:TextIO, count:int, seed:int = 1, offroute:float = 0.0) -> None:
+    """ Write count waypoints in a format """
+    match fmt:
+        case 'spansh': write_spansh(f, count, seed)
+        case 'csv' | 'r2r' | 'fleet': write_csv(f, count, seed, fmt)
+        case 'edts': write_edts(f, count, seed)
+        case 'journal': write_journal(f, count, seed, offroute)
+        case _: raise ValueError(f"Unknown format {fmt}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--waypoints', type=int, default=1000, help="10 to 1,000,000 or more")
+    parser.add_argument('--format', choices=FORMATS, default='spansh')
+    parser.add_argument('--offroute', type=float, default=0.0, help="fraction of journal jumps that miss the route")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+
+    with open(args.out, 'w', encoding='utf-8', newline='') as f:
+        write(args.format, f, args.waypoints, args.seed, args.offroute)
+
+
+if __name__ == '__main__':
+    main()
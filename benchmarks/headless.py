@@ -0,0 +1,121 @@
+"""
+Run the plugin without EDMC or a display.
+The stub config module is put on the path before anything of ours is imported, the Tk
+widgets are replaced by a UI that does the same per refresh work minus the drawing, and
+Tk's idle queue is replaced by one the caller runs explicitly.
+"""
+import logging
+import sys
+from collections import Counter, deque
+from os import path
+from pathlib import Path
+
+sys.path.insert(0, path.join(path.dirname(__file__), 'stubs'))
+sys.path.insert(1, path.dirname(path.dirname(path.abspath(__file__))))
+
+import load  # noqa: E402
+from Router.constants import lbls, NAME  # noqa: E402
+from Router.context import Context  # noqa: E402
+from Router.journal import JournalEvents  # noqa: E402
+from Router.router import Router  # noqa: E402
+from Router.systems import SystemIndex  # noqa: E402
+from Router.ui import UI  # noqa: E402
+from utils.Debug import Debug  # noqa: E402
+
+
+class IdleLoop:
+    """ Stand-in for Tk's idle queue, callbacks only run when run() is called """
+    def __init__(self) -> None:
+        self.pending:deque = deque()
+
+
+    def after_idle(self, callback, *args) -> None:
+        self.pending.append((callback, args))
+
+
+    def run(self) -> int:
+        """ Run everything queued, including callbacks queued while running, returning how many ran """
+        ran:int = 0
+        while self.pending:
+            callback, args = self.pending.popleft()
+            callback(*args)
+            ran += 1
+        return ran
+
+
+class HeadlessUI(UI):
+    """
+    UI that does everything a refresh does apart from drawing: the waypoint text, its tooltip
+    and the clipboard copy. Counts what it was asked to show.
+    """
+    def __init__(self, loop:IdleLoop) -> None:
+        if hasattr(self, '_initialized'): return
+
+        self.parent:IdleLoop = loop
+        self._refresh:str|None = None
+        self.current:str|None = None
+        self.shown:Counter = Counter()
+        self.waypoint:str = ''
+        self.tip:str = ''
+        self.error:str = ''
+        self._initialized = True
+
+
+    def show_frame(self, which:str = 'Default') -> None:
+        if which == 'Route' and Context.router.next_stop == lbls['route_complete']:
+            Context.router.clear_route()
+            which = 'Default'
+        self.shown[which] += 1
+        if which == 'Route':
+            self._update_waypoint()
+        self.current = which
+
+
+    def _update_waypoint(self) -> None:
+        if Context.router.route == []:
+            return
+        wp:str = Context.router.next_stop
+        if Context.router.jumps != 0:
+            wp += f" ({Context.router.jumps} {lbls['jumps'] if Context.router.jumps != 1 else lbls['jump']})"
+        self.waypoint = wp
+        self.tip = self._waypoint_tip()
+        self.ctc(Context.router.next_stop)
+
+
+    def set_range(self, range:float, supercharge_mult:int) -> None:
+        pass
+
+
+    def enable_plot_gui(self, enable:bool) -> None:
+        pass
+
+
+    def show_error(self, error:str|None = None) -> None:
+        self.error = error or self.error
+
+
+    def hide_error(self) -> None:
+        self.error = ''
+
+
+def start(plugin_dir:Path, level:int = logging.WARNING) -> IdleLoop:
+    """ Start the plugin in plugin_dir the way plugin_start3 and plugin_app would, returning its idle loop """
+    plugin_dir.mkdir(parents=True, exist_ok=True)
+    Debug(str(plugin_dir))
+    Debug.logger.setLevel(level)
+    Context.plugin_name = NAME
+    Context.plugin_dir = plugin_dir
+    Context.plugin_useragent = f"{NAME}-benchmark"
+
+    loop:IdleLoop = IdleLoop()
+    JournalEvents(loop)
+    Context.router = Router()
+    Context.systems = SystemIndex()
+    Context.systems.add_many(Context.router.history)
+    Context.ui = HeadlessUI(loop)
+    return loop
+
+
+def journal_entry(entry:dict, system:str = '') -> None:
+    """ Hand an event to the plugin exactly as EDMC does """
+    load.journal_entry('Cmdr', False, system, '', entry, {})
@@ -0,0 +1,107 @@
+"""
+Measure route import throughput and memory over generated routes.
+
+    python -m benchmarks.importers --waypoints 10 1000 100000 1000000 --formats spansh csv r2r
+    python -m benchmarks.importers --waypoints 100000 --memory
+
+Each route is generated to a file first, then read through the same path the plugin uses:
+Spansh results are decoded and ingested as PlotJob does, csv files go through a CSVImport
+job via Router.import_csv and EDTS files through Router.plot_edts. Read is the time to turn
+the file into a route, install the time for the router to take it over and save it.
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+from os import path
+from pathlib import Path
+
+from . import generate, headless
+from Router.context import Context
+from Router.ingest import Ingested, ingest, spansh_reader
+
+FORMATS:tuple = ('spansh', 'csv', 'r2r', 'fleet', 'edts')
+
+
+def read(fmt:str, file:str) -> Ingested|None:
+    """ Turn a file into a route the way the plugin does for its format """
+    router = Context.router
+    match fmt:
+        case 'spansh':
+            with open(file, encoding='utf-8') as f:
+                return ingest(*spansh_reader(json.load(f)['result']['system_jumps']))
+        case 'edts':
+            router.plot_edts(file) # Reads and installs in one
+            return None
+        case _:
+            done:list = []
+            job = router.import_csv(file, lambda job, kind, payload: done.append((kind, payload)))
+            job.join()
+            kind, payload = done[-1]
+            if kind != 'done':
+                raise RuntimeError(f"Import of {file} failed: {payload}")
+            return payload
+
+
+def install(route:Ingested|None) -> None:
+    router = Context.router
+    if route is not None:
+        router.load_route(route)
+    router.flush()
+
+
+def measure(fmt:str, file:str, memory:bool) -> dict:
+    if memory:
+        tracemalloc.start()
+    started:float = time.perf_counter()
+    route:Ingested|None = read(fmt, file)
+    read_s:float = time.perf_counter() - started
+    peak:int = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+
+    started = time.perf_counter()
+    install(route)
+    install_s:float = time.perf_counter() - started
+    rows:int = len(Context.router.route)
+    return {'rows': rows, 'read_ms': round(read_s * 1000, 1), 'install_ms': round(install_s * 1000, 1),
+            'rows_per_s': int(rows / (read_s + install_s)) if rows else 0, 'peak_bytes': peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--waypoints', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--memory', action='store_true', help="trace the peak memory of reading, slows it down")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    work:Path = Path(tempfile.mkdtemp(prefix='neutron-import-'))
+    results:list = []
+    try:
+        headless.start(work / 'plugin')
+        Context.router.storage.delay = 3600.0 # Only our explicit flushes write
+        print(f"{'format':8}{'waypoints':>10}{'file MB':>9}{'rows':>10}{'read ms':>10}{'install ms':>12}{'rows/s':>11}{'peak MB':>9}")
+        for count in args.waypoints:
+            for fmt in args.formats:
+                file:str = str(work / f"route.{fmt}")
+                with open(file, 'w', encoding='utf-8', newline='') as f:
+                    generate.write(fmt, f, count, args.seed)
+                result:dict = {'format': fmt, 'waypoints': count, 'file_bytes': path.getsize(file), **measure(fmt, file, args.memory)}
+                results.append(result)
+                print(f"{fmt:8}{count:>10}{result['file_bytes'] / 2**20:>9.1f}{result['rows']:>10}{result['read_ms']:>10}"
+                      f"{result['install_ms']:>12}{result['rows_per_s']:>11}{result['peak_bytes'] / 2**20:>9.1f}")
+                Context.router.clear_route()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Plot routes, search systems and check for updates against the local stand-in, end to end.
+
+    python -m benchmarks.plot --plots 20 --latency 0.1 --jitter 0.05 --job-time 3 --waypoints 20000
+    python -m benchmarks.plot --plots 50 --route-errors 0.1 --server-errors 0.2
+
+Plots go through Router.plot_route exactly as the plot button does, with the route cache
+cleared before each so every one reaches the server. Reported per plot are the wall time,
+the time to the submission's first byte, the polls made and the time spent waiting between
+them, which is what the poll schedule constants in Router/constants.py are tuned by.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .standin import Behaviour, StandIn
+
+
+def summary(values:list) -> str:
+    if values == []:
+        return '-'
+    return f"{statistics.median(values):.3f} / {max(values):.3f}"
+
+
+def plots(count:int) -> list:
+    """ Plot count routes one after another, returning each job's outcome and stats """
+    from Router.context import Context
+    router = Context.router
+    results:list = []
+    for n in range(count):
+        router.cache.clear()
+        outcome:list = []
+        started:float = time.perf_counter()
+        job = router.plot_route(f"Synth {n}", "Synth end", 60, 72.4, 4, lambda job, kind, payload: outcome.append((kind, payload)))
+        job.join()
+        kind, payload = next((o for o in reversed(outcome) if o[0] != 'progress'), ('none', None))
+        results.append({'outcome': kind, 'wall_s': time.perf_counter() - started, 'ttfb_s': job.stats.ttfb,
+                        'polls': job.stats.polls, 'waited_s': job.stats.waited,
+                        'waypoints': len(payload.table) if kind == 'done' else 0})
+    return results
+
+
+def lookups(count:int) -> list:
+    """ Time system name searches the way the autocompleter makes them """
+    from Router.constants import SPANSH_SYSTEMS
+    from Router.network import Network
+    timings:list = []
+    for n in range(count):
+        started:float = time.perf_counter()
+        r = Network().get(SPANSH_SYSTEMS, params={'q': f"Syn{n}"}, timeout=3)
+        json.loads(r.content)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def update(plugin_dir:Path) -> dict:
+    """
+    Time the background update check, download and staging, then a second launch that should
+    find everything cached, then the install a shutdown would do
+    """
+    from semantic_version import Version  # type: ignore
+    from Router.constants import DATA_DIR
+    from Router.updater import Updater
+    timings:dict = {}
+    for launch in ('first_s', 'second_s'):
+        Updater._instance = None # As if EDMC had been restarted
+        updater:Updater = Updater(Version('0.0.1'), str(plugin_dir))
+        started:float = time.perf_counter()
+        updater.run() # What load.check_for_update does on its thread
+        timings[launch] = round(time.perf_counter() - started, 3)
+    timings['staged'] = updater.staged()
+
+    started = time.perf_counter()
+    updater.install()
+    timings['install_s'] = round(time.perf_counter() - started, 3)
+    timings['installed'] = (plugin_dir / 'version').read_text() if (plugin_dir / 'version').exists() else None
+    timings['data_kept'] = (plugin_dir / DATA_DIR).is_dir()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plots', type=int, default=10)
+    parser.add_argument('--lookups', type=int, default=20, help="system searches to make")
+    parser.add_argument('--no-update', action='store_true', help="skip the update check")
+    parser.add_argument('--json', help="also write the results to this file")
+    for name, value in vars(Behaviour()).items():
+        parser.add_argument('--' + name.replace('_', '-'), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    count, searches, skip_update, out = args.pop('plots'), args.pop('lookups'), args.pop('no_update'), args.pop('json')
+
+    standin:StandIn = StandIn(Behaviour(**args)).start()
+    os.environ.update(standin.environment()) # Before the plugin's constants are imported
+    from . import headless
+
+    work:Path = Path(tempfile.mkdtemp(prefix='neutron-plot-'))
+    try:
+        headless.start(work / 'plugin')
+        result:dict = {'plots': plots(count), 'lookups_s': lookups(searches)}
+        if not skip_update:
+            result['update'] = update(work / 'plugin')
+    finally:
+        standin.stop()
+        shutil.rmtree(work, ignore_errors=True)
+    result['requests'] = standin.counters.requests
+    result['injected_errors'] = standin.counters.errors
+
+    done:list = [p for p in result['plots'] if p['outcome'] == 'done']
+    outcomes:dict = {}
+    for p in result['plots']:
+        outcomes[p['outcome']] = outcomes.get(p['outcome'], 0) + 1
+    print(f"{count} plots: {outcomes}, median / max of those that completed:")
+    print(f"    wall s    {summary([p['wall_s'] for p in done])}")
+    print(f"    ttfb s    {summary([p['ttfb_s'] for p in done])}")
+    print(f"    waited s  {summary([p['waited_s'] for p in done])}")
+    print(f"    polls     {summary([float(p['polls']) for p in done])}")
+    print(f"{searches} system searches, s: {summary(result['lookups_s'])}")
+    if 'update' in result:
+        print(f"Update: {result['update']}")
+    print(f"Requests served: {result['requests']}, injected errors: {result['injected_errors']}")
+    if out:
+        with open(out, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Replay a journal through the plugin and report what each event costs.
+
+    python -m benchmarks.replay --waypoints 100000 --burst 1 --flush-every 100
+    python -m benchmarks.replay --journal Journal.2025-01-01T000000.01.log --allocations
+
+Without --journal a synthetic route of --waypoints systems is plotted and flown, see
+generate.journal(), with --offroute of the jumps landing beside the route instead of on it.
+Recorded journals are replayed as they are against a route made of the systems they jump to.
+
+Events are handed to journal_entry in bursts of --burst, each followed by an idle cycle in
+which the plugin applies them; state is flushed to disk every --flush-every events.
+Latency percentiles are reported for journal_entry, the idle cycles and the flushes, with
+the bytes written and, with --allocations, the memory allocated while replaying.
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from . import generate, headless
+from Router.context import Context
+from Router.ingest import ingest, rows_reader
+
+HEADERS:list = ['System Name', 'Jumps', 'Neutron', 'Distance Jumped', 'Distance Remaining', 'X', 'Y', 'Z']
+
+
+def recorded_journal(files:list) -> tuple[list, list]:
+    """ Read journal files, returning their events and a route through the systems they jump to """
+    events:list = []
+    rows:list = []
+    system:str = ''
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry:dict = json.loads(line)
+                system = entry.get('StarSystem', system)
+                events.append((entry, system))
+                if entry.get('event') in ('FSDJump', 'Location') and 'StarPos' in entry:
+                    if rows == [] or rows[-1][0] != system:
+                        rows.append([system, 0 if rows == [] else 1, False, entry.get('JumpDist', 0.0), 0.0, *entry['StarPos']])
+    return events, rows
+
+
+def percentiles(samples:list) -> dict:
+    """ Summary of latencies in nanoseconds, reported in microseconds """
+    if samples == []:
+        return {'count': 0}
+    ordered:list = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000, 1)
+    return {'count': len(ordered), 'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99),
+            'max': round(ordered[-1] / 1000, 1), 'total_ms': round(sum(ordered) / 1e6, 2)}
+
+
+def replay(events:list, rows:list, burst:int, flush_every:int, allocations:bool) -> dict:
+    """ Plot the route then replay the events against it """
+    plugin_dir:Path = Path(tempfile.mkdtemp(prefix='neutron-bench-'))
+    try:
+        loop = headless.start(plugin_dir)
+        router = Context.router
+        router.storage.delay = 3600.0 # Only our explicit flushes write
+
+        started:float = time.perf_counter()
+        router.system = rows[0][0]
+        router.set_route(ingest(*rows_reader(HEADERS, rows)), rows[0][0], rows[-1][0], 60, 72.4)
+        router.flush()
+        setup:dict = {'waypoints': len(rows), 'ms': round((time.perf_counter() - started) * 1000, 2),
+                      'route_bytes': router.storage.bytes_written}
+        router.storage.bytes_written = 0
+
+        if allocations:
+            tracemalloc.start()
+        before:int = tracemalloc.get_traced_memory()[0] if allocations else 0
+        entry_ns:list = []
+        cycle_ns:list = []
+        flush_ns:list = []
+        clock = time.perf_counter_ns
+        for n, (entry, system) in enumerate(events, 1):
+            t:int = clock()
+            headless.journal_entry(entry, system)
+            entry_ns.append(clock() - t)
+            if n % burst == 0 or n == len(events):
+                t = clock()
+                loop.run()
+                cycle_ns.append(clock() - t)
+            if n % flush_every == 0 or n == len(events):
+                t = clock()
+                router.flush()
+                flush_ns.append(clock() - t)
+
+        result:dict = {
+            'setup': setup,
+            'events': len(events),
+            'journal_entry_us': percentiles(entry_ns),
+            'idle_cycle_us': percentiles(cycle_ns),
+            'flush_us': percentiles(flush_ns),
+            'bytes_written': router.storage.bytes_written,
+            'frames_shown': dict(Context.ui.shown),
+            'final_offset': router.offset,
+        }
+        if allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result['allocations'] = {'retained_bytes': current - before, 'peak_bytes': peak,
+                                     'retained_per_event': round((current - before) / max(1, len(events)), 1)}
+        return result
+    finally:
+        shutil.rmtree(plugin_dir, ignore_errors=True)
+
+
+def report(result:dict) -> None:
+    setup:dict = result['setup']
+    print(f"Route of {setup['waypoints']} waypoints set in {setup['ms']} ms, {setup['route_bytes']} bytes saved")
+    print(f"{result['events']} events, {result['bytes_written']} bytes of state written, ended at offset {result['final_offset']}")
+    print(f"{'':16}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'total ms':>12}")
+    for key, label in (('journal_entry_us', 'journal_entry'), ('idle_cycle_us', 'idle cycle'), ('flush_us', 'flush')):
+        p:dict = result[key]
+        if p['count'] == 0:
+            continue
+        print(f"{label:16}{p['count']:>8}{p['p50']:>10}{p['p90']:>10}{p['p99']:>10}{p['max']:>10}{p['total_ms']:>12}")
+    print(f"Frames shown: {result['frames_shown']}")
+    if 'allocations' in result:
+        a:dict = result['allocations']
+        print(f"Allocations: {a['retained_bytes']} bytes retained ({a['retained_per_event']} per event), peak {a['peak_bytes']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--waypoints', type=int, default=10000, help="size of the synthetic route")
+    parser.add_argument('--journal', nargs='+', help="replay these journal files instead of a synthetic journey")
+    parser.add_argument('--offroute', type=float, default=0.0, help="fraction of synthetic jumps that miss the route")
+    parser.add_argument('--burst', type=int, default=1, help="events delivered between idle cycles")
+    parser.add_argument('--flush-every', type=int, default=100, help="events between writes of state to disk")
+    parser.add_argument('--allocations', action='store_true', help="trace memory allocations, slows the replay")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.journal:
+        events, rows = recorded_journal(args.journal)
+        if rows == []:
+            parser.error("the journals don't jump to any systems")
+    else:
+        rows = [list(w) for w in generate.waypoints(args.waypoints, args.seed)]
+        events = list(generate.journal(args.waypoints, args.seed, args.offroute))
+
+    result:dict = replay(events, rows, max(1, args.burst), max(1, args.flush_every), args.allocations)
+    report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Local stand-in for the Spansh and GitHub endpoints the plugin uses.
+
+    python -m benchmarks.standin --port 8765 --latency 0.05 --job-time 2 --waypoints 5000
+    NEUTRONDANCER_SPANSH=http://127.0.0.1:8765/api NEUTRONDANCER_GITHUB=http://127.0.0.1:8765 <run EDMC>
+
+Spansh:
+    POST /api/route                 202 with a job id, or 400 for --route-errors of requests
+    GET  /api/results/<job>         202 until --job-time has passed, then 200 with the route
+    GET  /api/systems?q=<prefix>    a list of matching system names
+GitHub:
+    GET  /raw/<user>/<project>/master/version
+    GET  /api/repos/<user>/<project>/releases/latest
+    GET  /api/repos/<user>/<project>/zipball/<tag>
+
+GitHub responses carry an ETag and answer If-None-Match with a 304, the zipball honours Range
+and If-Range and --truncate of its downloads are cut off halfway so resuming can be tested.
+Every response is delayed by --latency plus up to --jitter seconds and --server-errors of them
+are replaced by a 503. Routes are generated by benchmarks.generate, so they're the same each run.
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from . import generate
+
+
+@dataclass
+class Behaviour:
+    """ How the stand-in responds """
+    latency:float = 0.0         # Seconds added to every response
+    jitter:float = 0.0          # Up to this many more seconds, at random
+    job_time:float = 1.0        # Seconds a route job takes to complete
+    route_errors:float = 0.0    # Fraction of route requests rejected with a 400
+    server_errors:float = 0.0   # Fraction of any request answered with a 503
+    waypoints:int = 1000        # Size of the routes returned
+    systems:int = 10            # Names returned per system search
+    version:str = '9.9.9'       # Version offered by GitHub
+    zip_bytes:int = 200_000     # Rough size of the release zip
+    truncate:float = 0.0        # Fraction of zip downloads cut off halfway
+    seed:int = 1
+
+
+@dataclass
+class Counters:
+    """ What the stand-in has been asked, for checking against what the plugin reports """
+    requests:dict = field(default_factory=dict)
+    errors:int = 0
+
+    def count(self, name:str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+
+class StandIn:
+    """ The stand-in server, run on a background thread """
+    def __init__(self, behaviour:Behaviour|None = None, host:str = '127.0.0.1', port:int = 0) -> None:
+        self.behaviour:Behaviour = behaviour or Behaviour()
+        self.counters:Counters = Counters()
+        self.jobs:dict = {}         # Job id -> time it completes, or None for a failed job
+        self.rng:random.Random = random.Random(self.behaviour.seed)
+        self.lock:threading.Lock = threading.Lock()
+        self._route:bytes|None = None
+        self._zip:bytes|None = None
+        self.server:ThreadingHTTPServer = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def start(self) -> 'StandIn':
+        threading.Thread(target=self.server.serve_forever, name="standin", daemon=True).start()
+        return self
+
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+    def environment(self) -> dict:
+        """ Environment variables that point the plugin at us """
+        return {'NEUTRONDANCER_SPANSH': f"{self.url}/api", 'NEUTRONDANCER_GITHUB': self.url}
+
+
+    def route(self) -> bytes:
+        if self._route is None:
+            out:io.StringIO = io.StringIO()
+            generate.write_spansh(out, self.behaviour.waypoints, self.behaviour.seed)
+            self._route = out.getvalue().encode('utf-8')
+        return self._route
+
+
+    def zipball(self) -> bytes:
+        """ A release zip shaped like GitHub's, a top level directory holding the plugin """
+        if self._zip is None:
+            out:io.BytesIO = io.BytesIO()
+            with zipfile.ZipFile(out, 'w', zipfile.ZIP_STORED) as z:
+                top:str = "dwomble-EDMC-NeutronDancer-0000000/"
+                z.writestr(top + "version", self.behaviour.version)
+                z.writestr(top + "padding.bin", random.Random(self.behaviour.seed).randbytes(self.behaviour.zip_bytes))
+            self._zip = out.getvalue()
+        return self._zip
+
+
+    def _handler(self) -> type:
+        standin:StandIn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args) -> None:
+                pass
+
+
+            def do_POST(self) -> None:
+                self._serve('POST')
+
+
+            def do_GET(self) -> None:
+                self._serve('GET')
+
+
+            def _serve(self, method:str) -> None:
+                length:int = int(self.headers.get('Content-Length', 0) or 0)
+                if length:
+                    self.rfile.read(length)
+                b:Behaviour = standin.behaviour
+                with standin.lock:
+                    delay:float = b.latency + standin.rng.uniform(0, b.jitter)
+                    failed:bool = standin.rng.random() < b.server_errors
+                time.sleep(delay)
+
+                url = urlsplit(self.path)
+                name, status, body, headers = standin.respond(method, url.path, parse_qs(url.query))
+                standin.counters.count(name)
+                if failed:
+                    standin.counters.errors += 1
+                    status, body, headers = 503, b'{"error": "Service unavailable"}', {'Retry-After': '1'}
+                elif status == 200:
+                    status, body, headers = standin.conditional(name, self.headers, body, headers)
+
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Content-Type', headers.pop('Content-Type', 'application/json'))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                if name == 'zipball' and status in (200, 206) and standin.cut():
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+
+    def cut(self) -> bool:
+        with self.lock:
+            cut:bool = self.rng.random() < self.behaviour.truncate
+        if cut:
+            self.counters.errors += 1
+        return cut
+
+
+    def conditional(self, name:str, request, body:bytes, headers:dict) -> tuple[int, bytes, dict]:
+        """ Apply If-None-Match, Range and If-Range to a successful GitHub response """
+        if name not in ('version', 'release', 'zipball'):
+            return 200, body, headers
+        etag:str = '"' + hashlib.sha1(body).hexdigest() + '"'
+        headers = {**headers, 'ETag': etag}
+        if request.get('If-None-Match') == etag:
+            return 304, b'', headers
+        ranged = re.fullmatch(r'bytes=(\d+)-', request.get('Range', ''))
+        if name != 'zipball' or ranged is None or request.get('If-Range', etag) != etag:
+            return 200, body, headers
+        start:int = int(ranged.group(1))
+        if start >= len(body):
+            return 416, b'', {**headers, 'Content-Range': f"bytes */{len(body)}"}
+        return 206, body[start:], {**headers, 'Content-Range': f"bytes {start}-{len(body) - 1}/{len(body)}"}
+
+
+    def respond(self, method:str, path:str, query:dict) -> tuple[str, int, bytes, dict]:
+        """ Work out the response to a request, as (endpoint name, status, body, headers) """
+        b:Behaviour = self.behaviour
+        if method == 'POST' and path == '/api/route':
+            with self.lock:
+                job:str = uuid.uuid4().hex
+                rejected:bool = self.rng.random() < b.route_errors
+                self.jobs[job] = None if rejected else time.monotonic() + b.job_time
+            if rejected:
+                return 'route', 400, json.dumps({'error': "Could not find starting system"}).encode(), {}
+            return 'route', 202, json.dumps({'job': job, 'status': 'queued'}).encode(), {}
+
+        if (m := re.fullmatch(r'/api/results/(\w+)', path)) and method == 'GET':
+            done:float|None = self.jobs.get(m.group(1))
+            if done is None: # Unknown or rejected
+                return 'results', 400, json.dumps({'error': "Job not found or failed"}).encode(), {}
+            if time.monotonic() < done:
+                return 'results', 202, json.dumps({'job': m.group(1), 'status': 'queued'}).encode(), {}
+            return 'results', 200, self.route(), {}
+
+        if path == '/api/systems' and method == 'GET':
+            prefix:str = query.get('q', [''])[0]
+            return 'systems', 200, json.dumps([f"{prefix} {i}" for i in range(b.systems)]).encode(), {}
+
+        if re.fullmatch(r'/raw/[^/]+/[^/]+/master/version', path):
+            return 'version', 200, b.version.encode(), {'Content-Type': 'text/plain'}
+
+        if m := re.fullmatch(r'/api/repos/([^/]+)/([^/]+)/releases/latest', path):
+            release:dict = {'tag_name': f"v{b.version}", 'name': f"v{b.version}",
+                            'body': f"## v{b.version}\r\n* Synthetic release\r\n",
+                            'zipball_url': f"{self.url}/api/repos/{m.group(1)}/{m.group(2)}/zipball/v{b.version}"}
+            return 'release', 200, json.dumps(release).encode(), {}
+
+        if re.fullmatch(r'/api/repos/[^/]+/[^/]+/zipball/[^/]+', path):
+            return 'zipball', 200, self.zipball(), {'Content-Type': 'application/zip'}
+
+        return 'unknown', 404, json.dumps({'error': "Not found"}).encode(), {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    defaults:Behaviour = Behaviour()
+    for name, value in vars(defaults).items():
+        parser.add_argument('--' + name.replace('_', '-'), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop('host'), args.pop('port')
+
+    standin:StandIn = StandIn(Behaviour(**args), host, port)
+    print(f"Serving on {standin.url}, point the plugin at it with:")
+    for k, v in standin.environment().items():
+        print(f"    {k}={v}")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests: {standin.counters.requests}, injected errors: {standin.counters.errors}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Stand-in for EDMC's config module so the plugin can be imported outside EDMC.
+Settings read as EDMC's defaults: the default theme and 100% UI scale.
+"""
+appname:str = 'EDMarketConnector'
+
+
+class Config:
+    def __init__(self) -> None:
+        self.settings:dict = {'theme': 0, 'ui_scale': 100, 'dark_text': '#ff8000'}
+
+
+    def get_int(self, key:str, default:int = 0) -> int:
+        return int(self.settings.get(key, default))
+
+
+    def get_str(self, key:str, default:str = '') -> str:
+        return str(self.settings.get(key, default))
+
+
+    def get(self, key:str, default = None):
+        return self.settings.get(key, default)
+
+
+    def set(self, key:str, value) -> None:
+        self.settings[key] = value
+
+
+config:Config = Config()
@@ -1,40 +1,59 @@
-import logging
-import os
-import tkinter as tk
-import tkinter.messagebox as confirmDialog
-from pathlib import Path
-from semantic_version import Version #type: ignore
+from utils.Profiler import Profiler
+imports:Profiler = Profiler("Plugin imports")
 
-from config import appname  # type: ignore
+import threading  # noqa: E402
+import tkinter as tk  # noqa: E402
+from pathlib import Path  # noqa: E402
 
-from Router.constants import GIT_PROJECT, NAME, errs, lbls
-from utils.Debug import Debug, catch_exceptions
+from config import appname  # type: ignore  # noqa: E402
 
-from Router.updater import Updater
-from Router.context import Context
-from Router.router import Router
-from Router.ui import UI
+from Router.constants import GIT_PROJECT, NAME, errs, lbls  # noqa: E402
+from utils.Debug import Debug, catch_exceptions  # noqa: E402
+from utils.Clipboard import Clipboard  # noqa: E402
+from utils.Dispatcher import Dispatcher  # noqa: E402
+
+# Networking, numpy, the updater, csv and zip handling are imported by whatever first needs them
+from Router.context import Context  # noqa: E402
+from Router.journal import JournalEvents  # noqa: E402
+from Router.router import Router  # noqa: E402
+from Router.systems import SystemIndex  # noqa: E402
+from Router.ui import UI  # noqa: E402
+imports.mark('modules')
 
 @catch_exceptions
 def plugin_start3(plugin_dir: str) -> str:
+    profile:Profiler = Profiler("plugin_start3")
     # Debug Class
     Debug(plugin_dir)
+    imports.report()
     Context.plugin_name = NAME
     Context.plugin_dir = Path(plugin_dir).resolve()
     version_file:Path = Context.plugin_dir / "version"
-    version = Version(version_file.read_text())
+    version:str = version_file.read_text().strip()
+    profile.mark('setup')
 
     Debug.logger.info(f"Starting (start3) {NAME} version {version} in {appname}")
 
     Context.plugin_useragent = f"{GIT_PROJECT}-{version}"
 
     Debug.logger.debug(f"Calling check for update")
-    Context.updater = Updater(version, str(Context.plugin_dir))
-    Context.updater.check_for_update()
+    threading.Thread(target=check_for_update, args=(version,), name="NeutronDancer-update", daemon=True).start()
+    profile.mark('updater')
+    profile.report()
 
     return NAME
 
 
+@catch_exceptions
+def check_for_update(version:str) -> None:
+    """ Load the updater and check for, download and stage an update, off the Tk thread """
+    from semantic_version import Version #type: ignore
+    from Router.updater import Updater
+    updater:Updater = Updater(Version(version), str(Context.plugin_dir))
+    Context.updater = updater
+    updater.run()
+
+
 @catch_exceptions
 def plugin_start(plugin_dir: str) -> None:
     """EDMC calls this function when running in Python 2 mode."""
@@ -44,29 +63,36 @@ def plugin_start(plugin_dir: str) -> None:
 @catch_exceptions
 def plugin_stop() -> None:
     Context.router.save()
+    Context.router.flush()
+    Context.systems.save()
+    if Context.updater is None: # Still loading, it will check again next time
+        return
+    Context.updater.stop()
     if Context.updater.install_update:
         Context.updater.install()
 
 
 @catch_exceptions
 def journal_entry(cmdr:str, is_beta:bool, system:str, station:str, entry:dict, state:dict) -> None:
-    match entry['event']:
-        case 'FSDJump' | 'Location' | 'SupercruiseExit' if entry.get('StarSystem', system) != Context.router.system:
-            Context.router.system = entry.get('StarSystem', system)
-            Context.router.update_route()
-        case 'StoredShips':
-            Context.router.shipyard = entry.get('ShipsHere', []) + entry.get('ShipsRemote', [])
-        case 'Loadout':
-            Context.router.set_ship(entry.get('ShipID', ''), entry.get('MaxJumpRange', 0.0), entry.get('ShipName', ''), entry.get('Ship', ''))
-        case 'ShipyardSwap':
-            Context.router.swap_ship(entry.get('ShipID', ''))
+    JournalEvents().add(entry, system)
 
 
 @catch_exceptions
 def plugin_app(parent:tk.Widget) -> tk.Frame:
+    profile:Profiler = Profiler("plugin_app")
+    Dispatcher().attach(parent)
+    Clipboard(parent)
+    JournalEvents(parent)
+    profile.mark('services')
     Context.router = Router()
+    profile.mark('router')
+    Context.systems = SystemIndex()
+    Context.systems.add_many(Context.router.history)
+    profile.mark('systems')
     Context.ui = UI(parent)
+    profile.mark('ui')
 
     Debug.logger.debug(f"Plugin_app")
+    profile.report()
 
     return Context.ui.frame
@@ -1,24 +1,66 @@
 import json
-import queue
-import requests
 import threading
 import tkinter as tk
+from collections import OrderedDict
 
 from config import config # type: ignore
 
 from utils.Debug import Debug, catch_exceptions
-from Router.context import Context
+from utils.Dispatcher import Dispatcher
+from Router.constants import SPANSH_SYSTEMS, AC_DEBOUNCE, AC_CACHE_SIZE, AC_MAX_RESULTS
+from Router.systems import SystemIndex
 from .Placeholder import Placeholder
 
 
 
+class PrefixCache:
+    """
+    LRU cache of query prefix to system names shared by all autocompleters.
+    A query can be answered from a shorter cached prefix when that prefix returned fewer than
+    the API's maximum number of results, since its list then holds every possible match.
+    """
+    def __init__(self, size:int = AC_CACHE_SIZE) -> None:
+        self.size:int = size
+        self._entries:OrderedDict = OrderedDict()
+        self._lock:threading.Lock = threading.Lock()
+
+
+    def get(self, prefix:str) -> list|None:
+        key:str = prefix.lower()
+        with self._lock:
+            for i in range(len(key), 2, -1):
+                results:list|None = self._entries.get(key[:i])
+                if results is None:
+                    continue
+                self._entries.move_to_end(key[:i])
+                if i == len(key):
+                    return results
+                if len(results) < AC_MAX_RESULTS:
+                    return [r for r in results if r.lower().startswith(key)]
+                return None
+        return None
+
+
+    def put(self, prefix:str, results:list) -> None:
+        with self._lock:
+            self._entries[prefix.lower()] = results
+            self._entries.move_to_end(prefix.lower())
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
 class Autocompleter(Placeholder):
     """
         An Entry widget with autocompletion functionality for system names
         Borrowed/stolen and modified from https://github.com/CMDR-Kiel42/EDMC_SpanshRouter
 
+        Keystrokes are debounced and handed to a single worker thread per widget. Every query
+        carries a sequence number so results that arrive after a newer query are dropped.
+
         @TODO: Modify to support a configurable function to query an API and return a list
     """
+    cache:PrefixCache = PrefixCache()
+
     def __init__(self, parent:tk.Frame, placeholder:str, **kw) -> None:
         self.parent:tk.Frame = parent
 
@@ -39,14 +81,19 @@ class Autocompleter(Placeholder):
         self.popup.withdraw()
         self.lb_up = False
         self.has_selected = False
-        self.queue:queue.Queue = queue.Queue()
+        self.seq:int = 0                    # Sequence number of the latest query
+        self.local:list = []                # Local index matches for the latest query
+        self._after_id:str|None = None      # Pending debounce timer
+        self._pending:tuple|None = None     # (seq, text) waiting for the worker
+        self._wake:threading.Event = threading.Event()
+        self._stopped:bool = False
+        threading.Thread(target=self._worker, name="NeutronDancer-autocomplete", daemon=True).start()
 
         self.bind("<Any-Key>", self.keypressed)
         self.lb.bind("<Any-Key>", self.keypressed)
         self.lb.bind("<ButtonRelease-1>", self.selection)
         self.bind("<FocusOut>", self.ac_focus_out)
         self.lb.bind("<FocusOut>", self.ac_focus_out)
-        self.update_me()
 
     def ac_focus_out(self, event=None) -> None:
         x, y = self.parent.winfo_pointerxy()
@@ -75,8 +122,40 @@ class Autocompleter(Placeholder):
             self.hide_list()
             self.has_selected = False
         else:
-            t = threading.Thread(target=self.query_systems, args=[value])
-            t.start()
+            self.seq += 1
+            # Answer straight away from the local index, Spansh results are merged in when they arrive
+            self.local = SystemIndex().search(value) if len(value.strip()) >= 3 and value.strip() != self.placeholder else []
+            if self.local:
+                self.show_results(self.local)
+            if self._after_id is not None:
+                self.after_cancel(self._after_id)
+            self._after_id = self.after(AC_DEBOUNCE, self._submit, value, self.seq)
+
+
+    def _submit(self, value:str, seq:int) -> None:
+        """ Hand the query to the worker once typing has paused, replacing anything not yet started """
+        self._after_id = None
+        self._pending = (seq, value)
+        self._wake.set()
+
+
+    def _worker(self) -> None:
+        """ Long lived query thread, only the most recent query is ever run """
+        while not self._stopped:
+            self._wake.wait()
+            self._wake.clear()
+            pending:tuple|None = self._pending
+            self._pending = None
+            if pending is None or pending[0] != self.seq:
+                continue
+            seq, value = pending
+            self.query_systems(value, seq)
+
+
+    def destroy(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        super().destroy()
 
     @catch_exceptions
     def selection(self, event=None) -> None:
@@ -151,29 +230,30 @@ class Autocompleter(Placeholder):
             self.lb_up = False
 
     @catch_exceptions
-    def query_systems(self, inp:str) -> None:
+    def query_systems(self, inp:str, seq:int = 0) -> None:
         inp = inp.strip()
         if inp != self.placeholder and inp.__len__() >= 3:
-            url = "https://spansh.co.uk/api/systems?"
-            results:requests.Response = requests.get(url,
-                                    params={'q': inp},
-                                    headers={'User-Agent': Context.plugin_useragent},
-                                    timeout=3)
-
-            lista = json.loads(results.content)
-            if lista:
-                self.queue.put(lista)
+            lista:list|None = self.cache.get(inp)
+            if lista is None:
+                from Router.network import Network # Networking is only loaded once they search
+                results = Network().get(SPANSH_SYSTEMS, params={'q': inp}, timeout=3)
+                if results.status_code != 200:
+                    Debug.logger.debug(f"System search for {inp} failed (status code {results.status_code})")
+                    return
+                lista = json.loads(results.content)
+                if not isinstance(lista, list): # An error rather than names, don't keep it
+                    Debug.logger.debug(f"System search for {inp} returned {type(lista).__name__}")
+                    return
+                self.cache.put(inp, lista)
+            if lista and seq == self.seq:
+                Dispatcher().post(self.update_me, seq, lista)
 
     @catch_exceptions
-    def update_me(self) -> None:
-        try:
-            while 1:
-                lista = self.queue.get_nowait()
-                self.show_results(lista)
-                self.update_idletasks()
-        except queue.Empty:
-            pass
-        self.after(100, self.update_me)
+    def update_me(self, seq:int, lista:list) -> None:
+        """ Show results delivered by the dispatcher, on the Tk thread """
+        if seq != self.seq: # Superseded by a newer query
+            return
+        self.show_results(self.local + [r for r in lista if r not in self.local])
 
     @catch_exceptions
     def set_text(self, text, placeholder_style=True) -> None:
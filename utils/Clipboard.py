@@ -0,0 +1,86 @@
+import sys
+import tkinter as tk
+
+from utils.Debug import Debug
+
+CLIPBOARD:str = 'CLIPBOARD'
+
+
+class Clipboard:
+    """
+    Plugin wide clipboard, set from the Tk thread.
+    On X11 we own the CLIPBOARD selection and hand over the current text when another
+    application asks for it, so changing the text is just an assignment while we keep
+    ownership. Elsewhere Tk's clipboard calls go straight to the system clipboard.
+    Copying the text that's already there does nothing, and nothing forces a Tk update.
+    """
+    # Singleton pattern
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, widget:tk.Misc|None = None) -> None:
+        # Only initialize if it's the first time
+        if hasattr(self, '_initialized'): return
+
+        self.widget:tk.Misc|None = None
+        self.text:str = ''
+        self.owned:bool = False         # Whether the clipboard still holds our text
+        self.selection:bool = False     # Whether we serve the clipboard through selection ownership
+        if widget is not None:
+            self.attach(widget)
+        self._initialized = True
+
+
+    def attach(self, widget:tk.Misc) -> None:
+        """ Bind to a widget on the Tk thread """
+        self.widget = widget
+        self.owned = False
+        self.selection = widget.tk.call('tk', 'windowingsystem') == 'x11' and sys.platform.startswith('linux')
+        if self.selection: # Most clients ask for UTF8_STRING, older ones and xterm for STRING
+            widget.selection_handle(self._request, selection=CLIPBOARD, type='UTF8_STRING')
+            widget.selection_handle(self._request, selection=CLIPBOARD)
+
+
+    def copy(self, text:str) -> None:
+        """ Put text on the clipboard unless it's already there """
+        if self.widget is None or self._holds(text):
+            return
+        self.text = text
+        try:
+            if self.selection:
+                if not self.owned:
+                    self.widget.selection_own(selection=CLIPBOARD, command=self._lost)
+            else:
+                self.widget.clipboard_clear()
+                self.widget.clipboard_append(text)
+            self.owned = True
+        except tk.TclError as e:
+            Debug.logger.error(f"Unable to copy to the clipboard: {e}")
+
+
+    def _holds(self, text:str) -> bool:
+        """ Whether the clipboard already has this text """
+        if text != self.text or not self.owned:
+            return False
+        if self.selection: # We're told when we lose the selection
+            return True
+        try: # Without selection ownership ask, in case something else was copied since
+            return self.widget.clipboard_get() == text
+        except tk.TclError:
+            return False
+
+
+    def _request(self, offset:str, length:str) -> str:
+        """ Another application is pasting, hand it the requested part of our text """
+        start:int = int(offset)
+        return self.text[start:start + int(length)]
+
+
+    def _lost(self) -> None:
+        """ Something else was copied, the next copy has to take the clipboard back """
+        self.owned = False
@@ -0,0 +1,92 @@
+import threading
+import tkinter as tk
+from collections import deque
+
+from utils.Debug import Debug, catch_exceptions
+
+EVENT:str = '<<NeutronDancerDispatch>>'
+RETRY_MS:int = 500  # How long to wait before signalling again when the Tk thread couldn't be woken
+
+
+class Dispatcher:
+    """
+    Single plugin wide channel for background threads to hand results to the Tk thread.
+    Workers post callbacks from any thread; the Tk thread is woken by one virtual event,
+    only when something is pending, and runs everything queued since in a single pass.
+    """
+    # Singleton pattern
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+
+    def __init__(self, widget:tk.Misc|None = None) -> None:
+        # Only initialize if it's the first time
+        if not hasattr(self, '_initialized'):
+            self.widget:tk.Misc|None = None
+            self._pending:deque = deque()
+            self._lock:threading.Lock = threading.Lock()
+            self._signalled:bool = False
+            self._initialized = True
+        # A worker may have posted, and so created us, before the UI was built
+        if widget is not None and self.widget is None:
+            self.attach(widget)
+
+
+    def attach(self, widget:tk.Misc) -> None:
+        """ Bind to a widget on the Tk thread, anything posted before now is delivered once Tk is idle """
+        with self._lock:
+            self.widget = widget
+            self._signalled = True # Posts leave the waking to the idle callback
+        widget.bind(EVENT, self._run)
+        widget.after_idle(self._run)
+
+
+    def post(self, callback, *args) -> None:
+        """ Queue callback(*args) to run on the Tk thread, safe to call from any thread """
+        with self._lock:
+            self._pending.append((callback, args))
+            wake:bool = self.widget is not None and not self._signalled
+            if wake:
+                self._signalled = True
+        if wake:
+            self._signal()
+
+
+    def _signal(self) -> None:
+        """
+        Wake the Tk thread. Must be called without the lock held, Tk hands the event to its own
+        thread and waits for it, which may itself be waiting on the lock.
+        """
+        try:
+            self.widget.event_generate(EVENT, when='tail')
+        except (tk.TclError, RuntimeError) as e: # Tk's main loop isn't running yet, or is shutting down
+            Debug.logger.debug(f"Dispatcher unable to signal: {e}")
+            timer:threading.Timer = threading.Timer(RETRY_MS / 1000, self._retry)
+            timer.daemon = True
+            timer.start()
+
+
+    def _retry(self) -> None:
+        """ Signal again after a failed attempt, unless the pending callbacks have been run since """
+        with self._lock:
+            stalled:bool = bool(self._pending) and self._signalled
+        if stalled:
+            self._signal()
+
+
+    @catch_exceptions
+    def _run(self, event=None) -> None:
+        """ Run every pending callback, on the Tk thread """
+        with self._lock:
+            batch:deque = self._pending
+            self._pending = deque()
+            self._signalled = False
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception as e:
+                Debug.logger.error(f"Dispatched callback {getattr(callback, '__name__', callback)} failed", exc_info=e)
@@ -28,10 +28,8 @@ class Placeholder(tk.Entry):
         self.menu.add_command(label="Cut")
         self.menu.add_command(label="Copy")
         self.menu.add_command(label="Paste")
-        if menu != {}:
-            self.menu.add_separator()
-            for m, f in menu.items():
-                self.menu.add_command(label=m, command=partial(*f, m))
+        self.menu_items:dict = {}
+        self.set_menu(menu)
         self.bind('<Button-3>', partial(self.show_menu))
 
         self.bind("<FocusIn>", self.focus_in)
@@ -49,6 +47,17 @@ class Placeholder(tk.Entry):
 
         self.menu.tk.call("tk_popup", self.menu, e.x_root, e.y_root)
 
+    def set_menu(self, menu:dict) -> None:
+        """ Replace the extra right click menu entries, leaving the menu alone if they're unchanged """
+        if menu == self.menu_items:
+            return
+        self.menu.delete(3, tk.END)
+        if menu != {}:
+            self.menu.add_separator()
+            for m, f in menu.items():
+                self.menu.add_command(label=m, command=partial(*f, m))
+        self.menu_items = dict(menu)
+
     def put_placeholder(self) -> None:
         if self.get() != self.placeholder:
             self.set_text(self.placeholder, True)
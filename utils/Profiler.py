@@ -0,0 +1,31 @@
+import sys
+import time
+
+from utils.Debug import Debug
+
+
+class Profiler:
+    """
+    Times the phases of a piece of work, each running from the previous mark to the next,
+    and logs them in one line along with how many modules were imported meanwhile.
+    Used to keep an eye on what the plugin costs EDMC while it's starting up.
+    """
+    def __init__(self, name:str) -> None:
+        self.name:str = name
+        self.phases:list = []
+        self.modules:int = len(sys.modules)
+        self.started:float = time.perf_counter()
+        self._last:float = self.started
+
+
+    def mark(self, phase:str) -> None:
+        """ End a phase """
+        now:float = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+
+    def report(self) -> None:
+        total:float = time.perf_counter() - self.started
+        phases:str = ", ".join(f"{phase} {secs * 1000:.1f}" for phase, secs in self.phases)
+        Debug.logger.info(f"{self.name} took {total * 1000:.1f} ms ({phases}), {len(sys.modules) - self.modules} modules imported")
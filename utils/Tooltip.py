@@ -12,6 +12,7 @@ class ToolTipBase:
     def __init__(self, button):
         self.button = button
         self.tipwindow = None
+        self.label = None
         self.id = None
         self.x = self.y = 0
         self._id1 = self.button.bind("<Enter>", self.enter)
@@ -51,13 +52,14 @@ class ToolTipBase:
 
     def showcontents(self, text="Your text here"):
         # Override this in derived class
-        label = tk.Label(self.tipwindow, text=text, justify=tk.LEFT,
+        self.label = tk.Label(self.tipwindow, text=text, justify=tk.LEFT,
                       background="#ffffe0", relief=tk.SOLID, borderwidth=1)
-        label.pack()
+        self.label.pack()
 
     def hidetip(self):
         tw = self.tipwindow
         self.tipwindow = None
+        self.label = None
         if tw:
             tw.destroy()
 
@@ -70,3 +72,11 @@ class ToolTip(ToolTipBase):
 
     def showcontents(self):
         ToolTipBase.showcontents(self, self.text)
+
+    def set_text(self, text):
+        # Update the text in place, including a tip that's showing
+        if text == self.text:
+            return
+        self.text = text
+        if self.label:
+            self.label.configure(text=text)